@@ -0,0 +1,3 @@
+"""
+Benchmarks for the viper interpreter. Each module can be run on its own, IE ``python -m benchmarks.bench_vm``
+"""
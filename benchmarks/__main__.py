@@ -0,0 +1,42 @@
+"""
+Runs the benchmark suite, or only the benchmarks named on the command line, such as ``python -m benchmarks vm lexer``.
+"""
+import asyncio
+import importlib
+import inspect
+import pkgutil
+import sys
+
+import benchmarks
+
+def available() -> list:
+    return sorted(info.name[len("bench_"):] for info in pkgutil.iter_modules(benchmarks.__path__)
+                  if info.name.startswith("bench_"))
+
+def run(name: str) -> None:
+    try:
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+    except ImportError as e:
+        # some benchmarks need optional dependencies, which should not stop the rest of the suite
+        print(f"=== {name}: skipped, {e}\n")
+        return
+
+    print(f"=== {name}: {inspect.cleandoc(module.__doc__ or '').splitlines()[0]}")
+    if inspect.iscoroutinefunction(module.main):
+        asyncio.run(module.main())
+    else:
+        module.main()
+
+    print()
+
+def main(names: list) -> None:
+    names = names or available()
+    unknown = set(names) - set(available())
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}. Available: {', '.join(available())}")
+
+    for name in names:
+        run(name)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""
+Measures attribute heavy scripts, against the discord.py SafeAccess objects and against plain python objects.
+Requires discord.py, for viper.exts.discord.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import viper
+from viper.exts import discord
+
+def mock_context() -> SimpleNamespace:
+    async def send(*args):
+        return message
+
+    guild = SimpleNamespace(name="Discord.py", member_count=123, description="A guild", id=336642139381301249,
+                            get_member=lambda i: None, get_member_name=lambda n: None)
+    author = SimpleNamespace(name="Danny", nick=None, discriminator="0007", id=123456, send=send,
+                             mention="<@!123456>", guild=guild)
+    guild.owner = author
+    channel = SimpleNamespace(id=336642776609456130, name="General", guild=guild, is_nsfw=lambda: False,
+                              is_news=lambda: False, mention="<#336642776609456130>", topic="A channel", send=send)
+    guild.text_channels = [channel]
+    guild.get_channel = lambda i: channel
+    message = SimpleNamespace(content="Hi there", guild=guild, channel=channel, clean_content="Hi there", flags=None,
+                              jump_url="discord.com/url", author=author)
+    return SimpleNamespace(send=send, author=author, me=author, guild=guild, channel=channel, message=message)
+
+def attribute_script(lines: int, root: str) -> str:
+    templates = (
+        "a = {0}.author.name",
+        "b = {0}.message.channel.topic",
+        "c = {0}.channel.guild.name",
+        "d = {0}.message.author.discriminator",
+    )
+    return "\n".join(templates[i % len(templates)].format(root) for i in range(lines))
+
+async def time_program(program: viper.Program, injected: dict, use_vm: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(program.file, dict(injected), use_vm=use_vm)
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+async def main(lines: int = 4000, repeat: int = 5):
+    runner = viper.Runtime()
+    ctx = mock_context()
+    cases = {
+        "SafeAccess objects": ({"ctx": discord.SafeAccessContext(runner, ctx)}, "ctx"),
+        "python objects": ({"data": ctx}, "data"),
+    }
+    print(f"{'receiver':<20} {'tree walker':>12} {'vm':>12} {'per access (vm)':>16}")
+    for name, (injected, root) in cases.items():
+        program = viper.compile(attribute_script(lines, root), name)
+        tree = await time_program(program, injected, False, repeat)
+        vm = await time_program(program, injected, True, repeat)
+        accesses = lines * 2.5
+        print(f"{name:<20} {tree * 1000:>10.2f}ms {vm * 1000:>10.2f}ms {vm / accesses * 1e6:>14.2f}us")
+
+if __name__ == "__main__":
+    asyncio.run(main())
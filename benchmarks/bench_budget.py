@@ -0,0 +1,62 @@
+"""
+Measures the overhead of enforcing an execution budget, and how quickly an abusive script is stopped.
+"""
+import asyncio
+import time
+
+import viper
+from benchmarks.bench_vm import arithmetic_script, call_script
+
+BUDGET = {"max_statements": 10 ** 9, "max_depth": 10 ** 6, "timeout": 3600.0}
+LIMITED = {"max_statements": 10000, "max_depth": 100, "timeout": 0.1}
+
+ABUSIVE = {
+    "infinite recursion": "func f(n) {\n    f(n)\n}\nf(1)",
+    "call fan out": "func f(n) {\n    x = n\n}\nfunc g(n) {\n    f(n)\n    f(n)\n    f(n)\n    g(n)\n}\ng(1)",
+}
+
+async def time_program(program: viper.Program, use_vm: bool, repeat: int, **budget) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(program.file, use_vm=use_vm, **budget)
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+async def time_to_stop(program: viper.Program, use_vm: bool) -> tuple:
+    runtime = viper.Runtime(program.file, use_vm=use_vm, **LIMITED)
+    start = time.perf_counter()
+    try:
+        await runtime.execute(program)
+    except viper.ViperError as e:
+        return time.perf_counter() - start, type(e).__name__
+
+    return time.perf_counter() - start, "not stopped"
+
+async def main(repeat: int = 5):
+    scripts = {
+        "arithmetic": arithmetic_script(2000),
+        "function calls": call_script(2000),
+    }
+    print(f"{'script':<16} {'mode':>6} {'no budget':>12} {'budget':>12} {'overhead':>9}")
+    for name, source in scripts.items():
+        program = viper.compile(source, name)
+        program.bytecode
+        for use_vm in (False, True):
+            free = await time_program(program, use_vm, repeat)
+            limited = await time_program(program, use_vm, repeat, **BUDGET)
+            print(f"{name:<16} {'vm' if use_vm else 'tree':>6} {free * 1000:>10.2f}ms {limited * 1000:>10.2f}ms "
+                  f"{(limited / free - 1) * 100:>8.1f}%")
+
+    print()
+    print(f"{'abusive script':<20} {'mode':>6} {'stopped after':>14} {'error':>22}")
+    for name, source in ABUSIVE.items():
+        program = viper.compile(source, name)
+        for use_vm in (False, True):
+            elapsed, error = await time_to_stop(program, use_vm)
+            print(f"{name:<20} {'vm' if use_vm else 'tree':>6} {elapsed * 1000:>12.2f}ms {error:>22}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
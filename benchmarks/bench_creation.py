@@ -0,0 +1,38 @@
+"""
+Measures the time and memory taken to create a runtime and its global scope, as the amount of injected variables grows.
+"""
+import asyncio
+import time
+import tracemalloc
+
+import viper
+
+PROGRAM = viper.compile("x = 1", "<bench>")
+
+async def create(count: int, injected: dict) -> list:
+    runtimes = []
+    for _ in range(count):
+        runtime = viper.Runtime("<bench>", injected)
+        await runtime.execute(PROGRAM)
+        runtimes.append(runtime)  # the runtime keeps its global scope in globals
+
+    return runtimes
+
+async def main(count: int = 2000):
+    print(f"{'injected':>8} {'per runtime':>12} {'memory each':>12}")
+    for size in (0, 100, 1000, 10000):
+        injected = {f"value_{i}": i for i in range(size)}
+        start = time.perf_counter()
+        await create(count, injected)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        runtimes = await create(count, injected)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del runtimes
+
+        print(f"{size:>8} {elapsed / count * 1e6:>10.1f}us {memory / count / 1024:>10.2f}KB")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+"""
+Measures the cost of a viper function call, reading global variables, at increasing call stack depths.
+With resolved variables, the cost per call should not depend on the depth.
+"""
+import asyncio
+import time
+
+import viper
+
+def recursive_script(depth: int) -> str:
+    return f"""
+g = 1
+func r(n) {{
+    a = g + g
+    b = g + a
+    c = g + b
+    if (n > 0) {{
+        m = n - 1
+        r(m)
+    }}
+}}
+r({depth})
+"""
+
+async def main(repeat: int = 5):
+    print(f"{'depth':>6} {'tree walker':>14} {'vm':>14}")
+    for depth in (10, 50, 100):
+        program = viper.compile(recursive_script(depth))
+        results = []
+        for use_vm in (False, True):
+            best = float("inf")
+            for _ in range(repeat):
+                runtime = viper.Runtime(use_vm=use_vm)
+                start = time.perf_counter()
+                await runtime.execute(program)
+                best = min(best, time.perf_counter() - start)
+
+            results.append(best / (depth + 1))
+
+        print(f"{depth:>6} {results[0] * 1e6:>10.1f}us/call {results[1] * 1e6:>8.1f}us/call")
+
+if __name__ == "__main__":
+    asyncio.run(main())
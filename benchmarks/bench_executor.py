@@ -0,0 +1,37 @@
+"""
+Compares running many CPU heavy scripts in this process against running them in a ProcessExecutor.
+"""
+import asyncio
+import os
+import time
+
+import viper
+from benchmarks.bench_vm import call_script
+
+async def in_process(program: viper.Program, jobs: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(program.run(use_vm=True) for _ in range(jobs)))
+    return time.perf_counter() - start
+
+async def in_executor(executor: viper.ProcessExecutor, program: viper.Program, jobs: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.run(program, use_vm=True) for _ in range(jobs)))
+    return time.perf_counter() - start
+
+async def main(jobs: int = 32):
+    program = viper.compile(call_script(5000), "calls")
+    baseline = await in_process(program, jobs)
+    print(f"{'workers':>8} {'time':>10} {'speedup':>8}")
+    print(f"{'none':>8} {baseline * 1000:>8.0f}ms {1:>7.2f}x")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with viper.ProcessExecutor(workers) as executor:
+            await in_executor(executor, program, workers)  # start the workers, and load the program into them
+            elapsed = await in_executor(executor, program, jobs)
+
+        print(f"{workers:>8} {elapsed * 1000:>8.0f}ms {baseline / elapsed:>7.2f}x")
+        workers *= 2
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""
+Measures how long a heartbeat task is kept waiting while CPU heavy scripts run concurrently,
+with and without cooperative yielding.
+"""
+import asyncio
+import time
+
+import viper
+from benchmarks.bench_vm import arithmetic_script, call_script
+
+async def heartbeat(interval: float, delays: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        delays.append(time.perf_counter() - start - interval)
+
+async def run_scripts(program: viper.Program, count: int, use_vm: bool, quantum):
+    delays = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(0.005, delays, stop))
+    await asyncio.sleep(0)
+
+    runtimes = [viper.Runtime(program.file, use_vm=use_vm, quantum=quantum) for _ in range(count)]
+    start = time.perf_counter()
+    await asyncio.gather(*(runtime.execute(program) for runtime in runtimes))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    longest = max(runtime.longest_slice for runtime in runtimes)
+    return elapsed, max(delays, default=0.0), longest, sum(runtime.yields for runtime in runtimes)
+
+async def main(scripts: int = 20):
+    programs = {
+        "arithmetic": viper.compile(arithmetic_script(2000), "arithmetic"),
+        "function calls": viper.compile(call_script(2000), "function calls"),
+    }
+    print(f"{'script':<16} {'mode':>5} {'quantum':>8} {'total':>10} {'heartbeat lag':>14} {'longest slice':>14} "
+          f"{'yields':>7}")
+    for name, program in programs.items():
+        program.bytecode
+        for use_vm in (False, True):
+            for quantum in (None, 1000, 100):
+                elapsed, lag, longest, yields = await run_scripts(program, scripts, use_vm, quantum)
+                print(f"{name:<16} {'vm' if use_vm else 'tree':>5} {str(quantum):>8} {elapsed * 1000:>8.1f}ms "
+                      f"{lag * 1000:>12.2f}ms {longest * 1000:>12.2f}ms {yields:>7}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
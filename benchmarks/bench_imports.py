@@ -0,0 +1,25 @@
+"""
+Measures the cost of import statements, which reuse the module objects created by earlier runtimes.
+"""
+import asyncio
+import time
+
+import viper
+
+SOURCE = "import json\nimport random\nimport regex"
+
+async def main(runs: int = 20000):
+    program = viper.compile(SOURCE, "<imports>")
+    pool = viper.RuntimePool("<imports>")
+    await pool.run(SOURCE)  # the first import of each module loads its python module
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        async with pool.runtime() as runtime:
+            await runtime.execute(program)
+
+    elapsed = time.perf_counter() - start
+    print(f"{runs} runs of 3 imports: {elapsed * 1000:.0f}ms, {elapsed / runs / 3 * 1e6:.2f}us per import")
+
+if __name__ == "__main__":
+    asyncio.run(main())
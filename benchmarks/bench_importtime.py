@@ -0,0 +1,42 @@
+"""
+Measures the time taken to import viper, with ``python -X importtime``, for the common ways of using it.
+Each statement runs in a fresh interpreter, and the best of several runs is reported.
+"""
+import subprocess
+import sys
+
+STATEMENTS = (
+    "import viper",
+    "from viper import errors",
+    "import viper.objects",
+    "import viper; viper.Runtime",
+    "import viper; viper.ProcessExecutor",
+)
+
+def import_time(statement: str) -> tuple:
+    """
+    returns the microseconds spent importing viper modules, and the amount of modules imported
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True,
+                            check=True)
+    total = 0
+    modules = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules += 1
+        if name.startswith(" viper"):  # only top level imports, as nested imports are part of their cumulative time
+            total += int(cumulative)
+
+    return total, modules
+
+def main(repeat: int = 5):
+    print(f"{'statement':<40} {'import time':>12} {'modules':>8}")
+    for statement in STATEMENTS:
+        best = min(import_time(statement) for _ in range(repeat))
+        print(f"{statement:<40} {best[0] / 1000:>10.1f}ms {best[1]:>8}")
+
+if __name__ == "__main__":
+    main()
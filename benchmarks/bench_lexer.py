@@ -0,0 +1,32 @@
+"""
+Measures tokenizer throughput of the hand written ViperScanner against the sly based ViperLexer.
+"""
+import time
+
+from viper.lexer import ViperLexer
+from viper.scanner import ViperScanner
+
+from .bench_parser import synthetic_script
+
+def throughput(lexer, source: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in lexer.tokenize(source):
+            pass
+
+        best = min(best, time.perf_counter() - start)
+
+    return len(source.encode("utf8")) / best / 1024 / 1024
+
+def main(repeat: int = 5):
+    print(f"{'statements':>10} {'size':>9} {'sly':>11} {'scanner':>11} {'speedup':>8}")
+    for lines in (1000, 4000, 16000):
+        source = synthetic_script(lines)
+        sly = throughput(ViperLexer(), source, repeat)
+        scanner = throughput(ViperScanner(), source, repeat)
+        size = len(source.encode("utf8")) / 1024
+        print(f"{lines:>10} {size:>7.0f}KB {sly:>7.2f}MB/s {scanner:>7.2f}MB/s {scanner / sly:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares while and for loops against the recursive functions that were used to emulate them.
+Loops run their body in the current frame, so an iteration should cost about as much as the statements in it.
+"""
+import asyncio
+import time
+
+import viper
+from viper import objects
+
+def while_script(count: int) -> str:
+    return f"""
+total = 0
+i = 0
+while (i < {count}) {{
+    total = total + i
+    i = i + 1
+}}
+"""
+
+def recursive_count_script(count: int) -> str:
+    return f"""
+total = 0
+func step(i) {{
+    if (i < {count}) {{
+        total = total + i
+        step(i + 1)
+    }}
+}}
+step(0)
+"""
+
+FOR_SCRIPT = """
+total = 0
+for item in items {
+    total = total + item
+}
+"""
+
+RECURSIVE_ITER_SCRIPT = """
+total = 0
+func step(i) {
+    if (i < items.length()) {
+        total = total + items.get(i)
+        step(i + 1)
+    }
+}
+step(0)
+"""
+
+def make_list(count: int) -> objects.VPList:
+    items = objects.VPList(-1, None)
+    items._list.extend(objects.Integer(i, -1, None) for i in range(count))
+    return items
+
+async def time_program(program: viper.Program, use_vm: bool, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(use_vm=use_vm, max_depth=None, injected={"items": make_list(count)})
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best / count
+
+async def main(count: int = 2000, repeat: int = 5):
+    cases = (
+        ("while loop", while_script(count)),
+        ("recursion", recursive_count_script(count)),
+        ("for loop", FOR_SCRIPT),
+        ("recursive index", RECURSIVE_ITER_SCRIPT)
+    )
+    print(f"{'case':>16} {'tree walker':>14} {'vm':>14}")
+    for name, source in cases:
+        program = viper.compile(source)
+        tree = await time_program(program, False, count, repeat)
+        vm = await time_program(program, True, count, repeat)
+        print(f"{name:>16} {tree * 1e6:>5.1f}us/iteration {vm * 1e6:>5.1f}us/iteration")
+
+if __name__ == "__main__":
+    asyncio.run(main())
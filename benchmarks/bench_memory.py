@@ -0,0 +1,90 @@
+"""
+Measures the memory held by parsed programs, in bytes per line of source, against dict-backed nodes.
+
+"with dicts" is the same program with every node keeping its attributes in an instance dict, as the nodes did before
+they declared __slots__.
+"""
+import gc
+import tracemalloc
+
+import viper
+from viper import ast
+
+from .bench_parser import synthetic_script
+
+_dict_classes = {}
+
+def _slots(cls: type) -> list:
+    slots = []
+    for klass in cls.__mro__:
+        names = klass.__dict__.get("__slots__", ())
+        slots.extend((names,) if isinstance(names, str) else names)
+
+    return slots
+
+def _dict_backed(cls: type) -> type:
+    # a subclass without __slots__ has an instance dict, which the attributes are stored in instead of the slots
+    sub = _dict_classes.get(cls)
+    if sub is None:
+        sub = _dict_classes[cls] = type(cls.__name__, (cls,), {})
+
+    return sub
+
+def rebuild(value, dict_backed: bool):
+    """
+    copies a tree of nodes, with the same layout, or with every node keeping its attributes in an instance dict.
+    The values at the leaves, such as names and literals, are shared with the original tree
+    """
+    typ = type(value)
+    if isinstance(value, ast.Statement):
+        attributes = {slot: rebuild(getattr(value, slot), dict_backed) for slot in _slots(typ) if hasattr(value, slot)}
+        cls = _dict_backed(typ) if dict_backed else typ
+        node = cls.__new__(cls)
+        if dict_backed:
+            vars(node).update(attributes)
+        else:
+            for name, attribute in attributes.items():
+                setattr(node, name, attribute)
+
+        return node
+
+    if typ is list:
+        return [rebuild(item, dict_backed) for item in value]
+
+    if typ is tuple:
+        return tuple(rebuild(item, dict_backed) for item in value)
+
+    return value
+
+def traced(func) -> int:
+    # the memory still held by what func returns
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return after - before
+
+def main():
+    viper.compile(synthetic_script(100), cache=viper.ProgramCache(0))  # the parser's first run allocates its own tables
+    print(f"{'statements':>10} {'lines':>7} {'held':>10} {'per line':>10} {'with dicts':>11}")
+    for statements in (1000, 4000, 16000):
+        source = synthetic_script(statements)
+        lines = source.count("\n") + 1
+        size = traced(lambda: viper.compile(source, cache=viper.ProgramCache(0)))
+
+        # both layouts are measured as copies of the same program, so the only difference is where the attributes are
+        program = viper.compile(source, cache=viper.ProgramCache(0))
+        rebuild(program.code, True)  # creates the dict backed classes
+        slotted = traced(lambda: rebuild(program.code, False))
+        dicts = traced(lambda: rebuild(program.code, True))
+        del program
+
+        with_dicts = size - slotted + dicts
+        print(f"{statements:>10} {lines:>7} {size / 1024:>8.0f}KB {size / lines:>9.0f}B {with_dicts / lines:>10.0f}B")
+
+if __name__ == "__main__":
+    main()
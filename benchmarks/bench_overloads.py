@@ -0,0 +1,47 @@
+"""
+Measures the cost of calling a function with many overloads, and a function with many parameters.
+With overloads looked up by argument count, and arguments bound by position, the cost per call should not depend on
+the amount of overloads, and should only grow with the amount of arguments evaluated.
+"""
+import asyncio
+import time
+
+import viper
+
+def overload_script(overloads: int, calls: int) -> str:
+    # the overload taking 2 arguments is always the one called, and only the amount of other overloads changes
+    defs = []
+    for count in range(overloads):
+        params = ", ".join(f"p{i}" for i in range(count if count < 2 else count + 1))
+        defs.append(f"func f({params}) {{\n    x = 1\n}}")
+
+    defs.append("func f(a, b) {\n    x = 1\n}")
+    return "\n".join(defs) + "\n" + "\n".join("f(1, 2)" for _ in range(calls))
+
+def parameter_script(parameters: int, calls: int) -> str:
+    params = ", ".join(f"p{i}" for i in range(parameters))
+    args = ", ".join(str(i) for i in range(parameters))
+    return f"func f({params}) {{\n    x = 1\n}}\n" + "\n".join(f"f({args})" for _ in range(calls))
+
+async def time_program(program: viper.Program, use_vm: bool, calls: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(use_vm=use_vm)
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best / calls
+
+async def main(calls: int = 2000, repeat: int = 5):
+    cases = [("other overloads", n, overload_script(n, calls)) for n in (0, 8, 32)]
+    cases += [("parameters", n, parameter_script(n, calls)) for n in (1, 8, 32)]
+    print(f"{'case':>20} {'tree walker':>14} {'vm':>14}")
+    for name, count, source in cases:
+        program = viper.compile(source)
+        tree = await time_program(program, False, calls, repeat)
+        vm = await time_program(program, True, calls, repeat)
+        print(f"{f'{count} {name}':>20} {tree * 1e6:>8.1f}us/call {vm * 1e6:>6.1f}us/call")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+Measures how parsing scales with the size of a script, and with the length of its lines.
+The tokens are produced ahead of time, so only the parser is timed.
+"""
+import time
+
+from viper.parser import ViperParser
+
+def synthetic_script(lines: int) -> str:
+    templates = (
+        "x{0} = {0} + 2 * 3",
+        "static s{0} = \"text {0}\"",
+        "say(x{0}, s{0})",
+        "func f{0}(a, b) {{\n    c = a + b\n    say(c)\n}}",
+        "if (x{0} == {0}) {{\n    say(\"yes\")\n}} else {{\n    say(\"no\")\n}}",
+        "try {{\n    throw \"oops\"\n}} catch {{\n    say(error)\n}}",
+    )
+    return "\n".join(templates[i % len(templates)].format(i) for i in range(lines))
+
+def long_line_script(terms: int) -> str:
+    return "x = " + " + ".join(str(i) for i in range(terms))
+
+def time_parse(source: str, repeat: int) -> float:
+    from viper.lexer import ViperLexer  # needs sly, which bench_memory does not
+    tokens = list(ViperLexer().tokenize(source))
+    parser = ViperParser()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse(list(tokens))
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def main(repeat: int = 5):
+    print(f"{'statements':>10} {'parse time':>12} {'per statement':>14}")
+    for lines in (500, 1000, 2000, 4000):
+        best = time_parse(synthetic_script(lines), repeat)
+        print(f"{lines:>10} {best * 1000:>10.2f}ms {best / lines * 1e6:>12.2f}us")
+
+    print()
+    print(f"{'terms':>10} {'parse time':>12} {'per term':>14}")
+    for terms in (25, 50, 100, 200):
+        best = time_parse(long_line_script(terms), repeat)
+        print(f"{terms:>10} {best * 1000:>10.2f}ms {best / terms * 1e6:>12.2f}us")
+
+if __name__ == "__main__":
+    main()
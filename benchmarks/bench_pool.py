@@ -0,0 +1,35 @@
+"""
+Compares evaluating a small script with a new runtime each time, against evaluating it with a RuntimePool.
+"""
+import asyncio
+import time
+
+import viper
+
+SOURCE = "x = 1 + 2\nif (x == 3) {\n    y = \"three\"\n}"
+
+async def fresh_runtimes(evals: int, injected: dict) -> float:
+    start = time.perf_counter()
+    for _ in range(evals):
+        await viper.Runtime("<bench>", dict(injected)).run(SOURCE)
+
+    return time.perf_counter() - start
+
+async def pooled_runtimes(evals: int, injected: dict) -> float:
+    pool = viper.RuntimePool("<bench>", injected)
+    start = time.perf_counter()
+    for _ in range(evals):
+        await pool.run(SOURCE)
+
+    return time.perf_counter() - start
+
+async def main(evals: int = 20000):
+    print(f"{'injected':>8} {'fresh':>12} {'pooled':>12} {'speedup':>8}")
+    for count in (0, 10, 100):
+        injected = {f"value_{i}": i for i in range(count)}
+        fresh = await fresh_runtimes(evals, injected)
+        pooled = await pooled_runtimes(evals, injected)
+        print(f"{count:>8} {evals / fresh:>8.0f}/sec {evals / pooled:>8.0f}/sec {fresh / pooled:>7.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
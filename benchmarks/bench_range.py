@@ -0,0 +1,58 @@
+"""
+Compares looping over a lazy range against building a list of the same integers and looping over that.
+A range creates each integer as it is reached, so its peak memory should not grow with the amount of integers.
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+
+import viper
+
+def range_script(count: int) -> str:
+    return f"""
+total = 0
+for i in range({count}) {{
+    total = total + i
+}}
+"""
+
+def list_script(count: int) -> str:
+    return f"""
+items = list()
+i = 0
+while (i < {count}) {{
+    items.append(i)
+    i = i + 1
+}}
+total = 0
+for item in items {{
+    total = total + item
+}}
+"""
+
+async def measure(program: viper.Program, use_vm: bool) -> tuple:
+    runtime = viper.Runtime(use_vm=use_vm)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    await runtime.execute(program)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+async def main():
+    print(f"{'case':>12} {'tree walker':>20} {'vm':>20}")
+    for count in (1000, 10000, 100000):
+        for name, script in (("range", range_script), ("list", list_script)):
+            program = viper.compile(script(count))
+            results = []
+            for use_vm in (False, True):
+                elapsed, peak = await measure(program, use_vm)
+                results.append(f"{elapsed * 1e3:>7.1f}ms {peak / 1024:>7.0f}KB")
+
+            print(f"{f'{name} {count}':>12} {results[0]:>20} {results[1]:>20}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Measures recursive functions at depths past python's recursion limit, with and without tail calls.
+Tail calls replace the calling frame, so their cost per call should not depend on the depth, and neither interpreter
+should run out of python stack for either function.
+"""
+import asyncio
+import time
+
+import viper
+
+def tail_script(depth: int) -> str:
+    return f"""
+func count(n, acc) {{
+    if (n == 0) {{
+        return acc
+    }}
+    return count(n - 1, acc + 1)
+}}
+count({depth}, 0)
+"""
+
+def nested_script(depth: int) -> str:
+    return f"""
+func count(n) {{
+    if (n == 0) {{
+        return 0
+    }}
+    m = count(n - 1)
+    return m + 1
+}}
+count({depth})
+"""
+
+async def time_program(program: viper.Program, use_vm: bool, depth: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(use_vm=use_vm, max_depth=None)
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best / (depth + 1)
+
+async def main(repeat: int = 3):
+    print(f"{'case':>18} {'tree walker':>14} {'vm':>14}")
+    for name, script in (("tail calls", tail_script), ("nested calls", nested_script)):
+        for depth in (100, 5000, 50000):
+            program = viper.compile(script(depth))
+            tree = await time_program(program, False, depth, repeat)
+            vm = await time_program(program, True, depth, repeat)
+            print(f"{f'{name} {depth}':>18} {tree * 1e6:>8.1f}us/call {vm * 1e6:>6.1f}us/call")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+"""
+Compares compiling scripts from source against loading them from the serialized format.
+"""
+import time
+
+import viper
+from viper import serialize
+
+from .bench_parser import synthetic_script
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+def main(repeat: int = 5):
+    print(f"{'statements':>10} {'compile':>10} {'load':>10} {'speedup':>8} {'size':>9}")
+    for statements in (1000, 4000, 16000):
+        source = synthetic_script(statements)
+        data = serialize.dumps(viper.compile(source, cache=viper.ProgramCache(0)))
+        compile_time = best_of(lambda: viper.compile(source, cache=viper.ProgramCache(0)), repeat)
+        load_time = best_of(lambda: serialize.loads(data), repeat)
+        print(f"{statements:>10} {compile_time * 1000:>8.1f}ms {load_time * 1000:>8.1f}ms "
+              f"{compile_time / load_time:>7.1f}x {len(data) / 1024:>7.0f}KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Compares the peak memory of running large config style scripts normally, and in streaming mode.
+"""
+import asyncio
+import time
+import tracemalloc
+
+import viper
+
+def config_script(lines: int) -> str:
+    return "\n".join(f"setting_{i} = \"value {i}\"" for i in range(lines))
+
+async def measure(source: str, stream: bool):
+    runtime = viper.Runtime("<config>", cache=viper.ProgramCache(0))
+    tracemalloc.start()
+    start = time.perf_counter()
+    await runtime.run(source, stream=stream)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+async def main():
+    print(f"{'lines':>8} {'mode':>8} {'time':>10} {'peak memory':>12}")
+    for lines in (10000, 20000, 40000):
+        source = config_script(lines)
+        for stream in (False, True):
+            elapsed, peak = await measure(source, stream)
+            print(f"{lines:>8} {'stream' if stream else 'normal':>8} {elapsed * 1000:>8.0f}ms {peak / 1024 / 1024:>10.2f}MB")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Compares the bytecode virtual machine against the tree walking interpreter.
+"""
+import asyncio
+import time
+
+import viper
+
+def arithmetic_script(lines: int) -> str:
+    code = ["x = 1"]
+    for i in range(lines):
+        code.append(f"x = x + {i} * 2")
+        code.append(f"y = x - {i} % 7")
+
+    return "\n".join(code)
+
+def call_script(calls: int) -> str:
+    code = [
+        "func add(a, b) {",
+        "    c = a + b",
+        "    d = c * 2",
+        "}",
+        "func wrapper(a) {",
+        "    add(a, 1)",
+        "}",
+    ]
+    for i in range(calls):
+        code.append(f"wrapper({i})")
+
+    return "\n".join(code)
+
+async def time_program(program: viper.Program, use_vm: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        runtime = viper.Runtime(program.file, use_vm=use_vm)
+        start = time.perf_counter()
+        await runtime.execute(program)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+async def main(repeat: int = 5):
+    scripts = {
+        "arithmetic": arithmetic_script(2000),
+        "function calls": call_script(2000),
+    }
+    print(f"{'script':<16} {'tree walker':>12} {'vm':>12} {'speedup':>8}")
+    for name, source in scripts.items():
+        program = viper.compile(source, name)
+        program.bytecode  # compile ahead of time, this is a one time cost
+        tree = await time_program(program, False, repeat)
+        vm = await time_program(program, True, repeat)
+        print(f"{name:<16} {tree * 1000:>10.2f}ms {vm * 1000:>10.2f}ms {tree / vm:>7.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
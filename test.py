@@ -1,6 +1,8 @@
 # run tests to check coverage
 import os
 import asyncio
+import struct
+import tempfile
 
 import discord as dpy
 import prettify_exceptions
@@ -16,6 +18,137 @@ loop = asyncio.get_event_loop()
 
 loop.run_until_complete(viper.eval_file(basic_test)) # run the basic script
 
+def run_script(path: str, **options):
+    # the test scripts throw when something is wrong, and are run with both the tree walker and the virtual machine
+    for use_vm in (False, True):
+        loop.run_until_complete(viper.eval_file(path, runtime=viper.Runtime(path, use_vm=use_vm, **options)))
+
+def expect_error(error: type, source: str, **options):
+    for use_vm in (False, True):
+        try:
+            loop.run_until_complete(viper.Runtime(use_vm=use_vm, **options).run(source))
+        except error:
+            continue
+
+        raise AssertionError(f"{source!r} did not raise {error.__name__} (use_vm={use_vm})")
+
+run_script(os.path.join("tests", "loops_test.vp"))
+expect_error(viper.errors.ViperTypeError, "for item in 5 {\n    say(item)\n}\n")
+
+run_script(os.path.join("tests", "recursion_test.vp"))
+nested_calls = """
+func depth(n) {
+    if (n == 0) {
+        return 0
+    }
+
+    m = depth(n - 1)
+    return m + 1
+}
+depth(200)
+"""
+expect_error(viper.ViperRecursionError, nested_calls, max_depth=100)
+
+run_script(os.path.join("tests", "range_test.vp"))
+expect_error(viper.ViperExecutionError, "numbers = range(3)\nnumbers.get(3)\n")
+expect_error(viper.ViperExecutionError, "numbers = range(3)\nnumbers.get(0 - 1)\n")
+expect_error(viper.ViperArgumentError, "numbers = range(0, 10, 0)\n")
+
+for use_vm in (False, True):
+    # a full list stops extend at its size limit
+    limited = viper.objects.VPList(-1, None)
+    limited._max_length = 3
+    runtime = viper.Runtime(use_vm=use_vm, injected={"limited": limited})
+    try:
+        loop.run_until_complete(runtime.run("limited.extend(range(5))\n"))
+    except viper.ViperExecutionError:
+        pass
+    else:
+        raise AssertionError(f"extend went past the size limit of the list (use_vm={use_vm})")
+
+    assert len(limited._list) == 3, limited._list
+
+# compiled programs survive a round trip through the binary format, and broken files are rejected
+serialize = viper.serialize
+program = viper.compile("total = 0\nfor i in range(5) {\n    total = total + i\n}\n")
+data = serialize.dumps(program)
+for use_vm in (False, True):
+    runtime = viper.Runtime(use_vm=use_vm)
+    loop.run_until_complete(runtime.execute(serialize.loads(data)))
+    assert runtime.globals._vars["total"][0]._value == 10
+
+wrong_version = bytearray(data)
+struct.pack_into("<H", wrong_version, 4, serialize.FORMAT_VERSION + 1)
+# the contents of each broken file, and the start of the error it should raise
+broken = {
+    "version": (bytes(wrong_version), "Compiled program uses format version"),
+    "magic": (b"NOPE" + data[4:], "Not a compiled viper program"),
+    "truncated": (data[:len(data) // 2], "Compiled program is truncated"),
+    "empty": (b"", "Not a compiled viper program")
+}
+
+def expect_rejected(load, name: str, message: str):
+    try:
+        load()
+    except ValueError as e:
+        assert str(e).startswith(message), f"a program with a bad {name} raised {e!r}"
+    else:
+        raise AssertionError(f"a program with a bad {name} was loaded")
+
+for name, (contents, message) in broken.items():
+    expect_rejected(lambda: serialize.loads(contents), name, message)
+
+with tempfile.TemporaryDirectory() as path:
+    directory = serialize.ProgramDirectory(path)
+    directory.save("program", program)
+    for name, (contents, _) in broken.items():
+        with open(os.path.join(path, name + ".vpc"), "wb") as fp:
+            fp.write(contents)
+
+    assert directory["program"].source == program.source
+    for name, (_, message) in broken.items():
+        expect_rejected(lambda: directory[name], name, message)
+
+# the program cache counts hits, misses and evictions, and keeps to its entry and byte limits
+cache = viper.ProgramCache(max_entries=2)
+first = viper.compile("a = 1\n", cache=cache)
+assert viper.compile("a = 1\n", cache=cache) is first
+assert cache.stats() == {"entries": 1, "bytes": 6, "hits": 1, "misses": 1, "evictions": 0}, cache.stats()
+
+viper.compile("b = 2\n", cache=cache)
+viper.compile("c = 3\n", cache=cache)
+assert cache.get("a = 1\n") is None  # the least recently used program makes room for the newest one
+assert cache.stats() == {"entries": 2, "bytes": 12, "hits": 1, "misses": 4, "evictions": 1}, cache.stats()
+
+cache = viper.ProgramCache(max_bytes=12)
+viper.compile("a = 1\n", cache=cache)
+viper.compile("bb = 2\n", cache=cache)
+assert len(cache) == 1 and cache.size == 7 and cache.evictions == 1, cache
+viper.compile("c = " + "1" * 20 + "\n", cache=cache)  # larger than the byte limit by itself, so never stored
+assert len(cache) == 1 and cache.size == 7, cache
+
+# pooled runtimes are reused, and nothing a run creates or is given is visible to the next run
+pool = viper.RuntimePool(injected={"shared": viper.Integer(1, -1, None)})
+loop.run_until_complete(pool.run("created = shared + 1\n", initial_variables={"given": 2}))
+for name in ("created", "given"):
+    try:
+        loop.run_until_complete(pool.run(f"leaked = {name}\n"))
+    except viper.ViperNameError:
+        pass
+    else:
+        raise AssertionError(f"'{name}' was visible to the next run of the pool")
+
+async def use_pool():
+    async with pool.runtime() as runtime:
+        await runtime.run("shared = 5\n")  # shadows the pool's variable in this runtime only
+        assert runtime.globals._vars["shared"][0]._value == 5
+
+    assert runtime.globals is None and not runtime.scopes  # reset once it is released
+
+loop.run_until_complete(use_pool())
+loop.run_until_complete(pool.run("if (shared != 1) {\n    throw \"the pool's variable was changed\"\n}\n"))
+assert pool.created == 1, pool.created
+
 class MockDpyObject:
     def __init__(self, **kwargs):
         for name, item in kwargs.items():
@@ -1,16 +1,79 @@
-from .runner import Runtime
-from .scope import Scope, InitialScope
-from . import objects
-from .objects import String, Integer, Boolean
+import importlib as _importlib
+import sys as _sys
 from .errors import *
 
-from typing import Union
+from typing import Any, Dict, Union, TYPE_CHECKING
 from os import PathLike as _PathLike
 from io import FileIO as _FileIO
 
+if TYPE_CHECKING:
+    from .runner import Runtime
+    from .cache import ProgramCache
+    from .program import Program
+    from .executor import ProcessExecutor
+    from .pool import RuntimePool
+    from .scope import Scope, InitialScope
+    from . import objects
+    from .objects import String, Integer, Boolean
+
 __version__ = "1.0.0"
 
-async def eval(code: str, filename="<string>", injected: dict=None, runtime: Runtime=None) -> Runtime:
+# the public names that live in submodules, and the submodule each one is in. The submodules are only imported once one
+# of their names is used, so importing viper for the errors, or for viper.objects, does not import the whole interpreter
+_lazy = {
+    "Runtime": ".runner",
+    "ProgramCache": ".cache",
+    "Program": ".program",
+    "ProcessExecutor": ".executor",
+    "RuntimePool": ".pool",
+    "Scope": ".scope",
+    "InitialScope": ".scope",
+    "String": ".objects",
+    "Integer": ".objects",
+    "Boolean": ".objects",
+}
+_lazy_modules = {"objects", "serialize"}
+
+def __getattr__(name: str) -> Any:
+    if name in _lazy_modules:
+        return _importlib.import_module(f".{name}", __name__)
+
+    module = _lazy.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(_importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip this function
+    return value
+
+def __dir__():
+    return sorted({*globals(), *_lazy, *_lazy_modules})
+
+def compile(code: str, filename="<string>", cache: "ProgramCache" = None, optimize: bool = False) -> "Program":
+    """
+    Compiles the passed code into a :class:`Program`, without executing it.
+    The returned Program can be executed as many times as needed, without the code being parsed again.
+
+    Parameters
+    -----------
+    code: :class:`str`
+        the code to compile
+    filename: Optional[:class:`str`]
+        the filename of the code you are compiling. Useful in tracebacks. Defaults to "<string>"
+    cache: Optional[:class:`ProgramCache`]
+        the cache to look the code up in, and to store the result in. Defaults to the shared cache.
+    optimize: :class:`bool`
+        whether to run the :class:`~viper.optimizer.Optimizer` over the code. Defaults to False
+
+    Returns
+    --------
+    :class:`Program` the compiled code
+    """
+    from .runner import Runtime
+    return Runtime(filename, cache=cache, optimize=optimize).compile(code)
+
+async def eval(code: str, filename="<string>", injected: dict=None, runtime: "Runtime"=None,
+               executor: "ProcessExecutor"=None) -> Union["Runtime", Dict[str, Any]]:
     """
     Evaluates the passed code in the viper runtime. This is a basic entrypoint into running viper code.
 
@@ -24,19 +87,26 @@ async def eval(code: str, filename="<string>", injected: dict=None, runtime: Run
         a dictionary of variables to inject into the namespace before evaluating the code.
     runtime: Optional[:class:`Runtime`]
         a pre-existing runtime to use instead of creating one
+    executor: Optional[:class:`ProcessExecutor`]
+        an executor to evaluate the code in a worker process with. See :meth:`ProcessExecutor.run`
 
     Returns
     --------
-    :class:`Runtime` the :class:`Runtime` that the code was evaluated with
+    :class:`Runtime` the :class:`Runtime` that the code was evaluated with, or when an executor is passed, a
+    dictionary of the global variables set by the code that hold a string, number or boolean
     """
+    if executor is not None:
+        return await executor.run(compile(code, filename), injected)
+
     if runtime and injected:
         runtime._injected.update(injected)
 
+    from .runner import Runtime
     runtime = runtime or Runtime(filename, injected)
     await runtime.run(code)
     return runtime
 
-async def eval_file(fp: Union[_PathLike, str, _FileIO], filename: str=None, injected: dict=None, runtime: Runtime=None) -> Runtime:
+async def eval_file(fp: Union[_PathLike, str, _FileIO], filename: str=None, injected: dict=None, runtime: "Runtime"=None) -> "Runtime":
     """
     A quicker way to evaluate files. Reads the given file and evaluates the contents.
 
@@ -63,3 +133,8 @@ async def eval_file(fp: Union[_PathLike, str, _FileIO], filename: str=None, inje
         filename = filename or fp.name
 
     return await eval(code, filename, injected=injected, runtime=runtime)
+
+if _sys.version_info < (3, 7):
+    # module level __getattr__ was added in python 3.7, so older versions import every submodule up front
+    for _name in (*_lazy_modules, *_lazy):
+        globals()[_name] = __getattr__(_name)
@@ -1,12 +1,20 @@
+import asyncio
 import functools
 import inspect
+import operator
 from typing import *
 from . import objects, errors
+from .scope import Frame
 
 if TYPE_CHECKING:
     from .runner import Runtime
     from .objects import VPObject
 
+# the tree walker nests several python frames for every viper call, so every STACK_SEGMENT calls the callee is run as a
+# new task, which starts from the event loop with an empty python stack. The call depth is then only bounded by
+# Runtime.max_depth, rather than by python's recursion limit
+STACK_SEGMENT = 16
+
 
 class dummy:
     __slots__ = "lineno", "type", "index"
@@ -21,6 +29,8 @@ class dummy:
 
 
 class Block(list):
+    __slots__ = "type", "lineno", "index"
+
     def __init__(self, lineno, index):
         super().__init__()
         self.type = "BLOCK"
@@ -29,11 +39,12 @@ class Block(list):
 
 
 class Statement:
-    __slots__ = "lineno", "offset"
+    __slots__ = "lineno", "offset", "sync"
 
     def __init__(self, lineno: int, offset: int):
         self.lineno = lineno
         self.offset = offset
+        self.sync = False  # set by mark_sync, when the node never needs to await anything
 
     def __str__(self):
         return f"[{self.__class__.__name__} lineno={self.lineno if hasattr(self, 'lineno') else None} {' '.join(f'{a}={getattr(self, a)}' for a in self.__slots__)}]"
@@ -45,16 +56,20 @@ class Statement:
 
 
 class Expr(Statement):
-    pass
+    __slots__ = ()
 
 
 class Identifier(Expr):
-    __slots__ = ('name',)
+    __slots__ = 'name', 'depth', 'slot'
     cls_name = "identifier"
 
     def __init__(self, name: str, lineno: int, offset: int):
         super().__init__(lineno, offset)
         self.name = name
+        # set by the resolver. depth is the amount of enclosing function frames to walk up, and slot the index of the
+        # variable in that frame. A depth of -1 means the name is global, and None that it hasnt been resolved
+        self.depth: Optional[int] = None
+        self.slot: Optional[int] = None
 
     def __eq__(self, other: Any):
         return isinstance(other, self.__class__) and other.name == self.name
@@ -69,7 +84,10 @@ class Identifier(Expr):
         return self
 
     async def execute(self, runner: "Runtime"):
-        return await runner.get_variable(self)
+        return runner._get_variable(self)
+
+    def execute_sync(self, runner: "Runtime"):
+        return runner._get_variable(self)
 
 
 class Assignment(Statement):
@@ -83,57 +101,126 @@ class Assignment(Statement):
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
-        await runner.set_variable(self.name, await self.value.execute(runner), self.static)
+        value = self.value.execute_sync(runner) if self.value.sync else await self.value.execute(runner)
+        runner._set_variable(self.name, value, self.static)
+
+    def execute_sync(self, runner: "Runtime"):
+        runner._set_variable(self.name, self.value.execute_sync(runner), self.static)
 
 
 class Cast(Expr):
     __slots__ = "name", "caster"
 
-    def __init__(self, name: Identifier, caster: Identifier, lineno: int, offset: int):
+    def __init__(self, name: Statement, caster: Identifier, lineno: int, offset: int):
         self.name = name
         self.caster = caster
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
-        caster = await runner.get_variable(self.caster)
-        if not issubclass(caster, objects.Primary) and not isinstance(caster, objects.Primary):
+        if self.name.sync:
+            return self.execute_sync(runner)
+
+        return self._cast(runner, await self.name.execute(runner))
+
+    def execute_sync(self, runner: "Runtime"):
+        return self._cast(runner, self.name.execute_sync(runner))
+
+    def _cast(self, runner: "Runtime", name: "VPObject"):
+        caster = runner._get_variable(self.caster)
+        if not (isinstance(caster, type) and issubclass(caster, objects.Primary)) \
+                and not isinstance(caster, objects.Primary):
             raise errors.ViperExecutionError(runner, self.name.lineno, f"Expected to cast to a basic type (string, "
                                                                        f"integer, bool), got '{caster}'")
 
-        name = await runner.get_variable(self.name)
-        if not name.__getattribute__("_cast"):
+        if not getattr(name, "_cast", None):
             raise errors.ViperExecutionError(runner, self.name.lineno, f"cannot use cast on {name}")
 
         return name.__getattribute__("_cast")(caster, self.lineno)
 
 
+def _get_attribute(runner: "Runtime", receiver: "VPObject", name: str, site: tuple) -> Any:
+    return getattr(receiver, name, None)
+
+
+def _get_native_attribute(runner: "Runtime", receiver: objects.PyNativeObjectWrapper, name: str, site: tuple) -> Any:
+    # public names are never set on the wrapper itself, so they always come from the wrapped object
+    return getattr(receiver._obj, name, None)
+
+
+def _get_wrapped_attribute(runner: "Runtime", receiver: objects.PyObjectWrapper, name: str, site: tuple) -> Any:
+    value = getattr(receiver._obj, name, None)
+    if value is None or isinstance(value, objects.VPObject):
+        return value
+
+    # the same python object is usually returned every time, so the wrapper made at this site is reused.
+    # The wrappers are kept by the runtime, as the nodes are shared between every runtime running the program
+    last = runner._wrappers.get(site)
+    if last is None or last[0] is not value:
+        last = runner._wrappers[site] = value, objects.PyObjectWrapper(receiver._runner, value)
+
+    return last[1]
+
+
 class Attribute(Statement):
-    __slots__ = "parent", "child", "appended_children"
+    __slots__ = "parent", "child", "appended_children", "_cache"
 
     def __init__(self, parent: Identifier, child: Identifier, lineno: int, offset: int,
                  appended_children: List[Identifier] = None):
         self.parent = parent
         self.child = child
         self.appended_children = appended_children
+        self._cache = None
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime", parent: Identifier = None):
+        return self.execute_sync(runner, parent)
+
+    def execute_sync(self, runner: "Runtime", parent: Identifier = None):
         if not self.parent and not parent:
             raise ValueError("no parent given")
 
-        parent = parent or self.parent
-        parent = await runner.get_variable(parent)
-        result = getattr(parent, self.child.name, None)
-
-        if result is None:
-            raise errors.ViperAttributeError(runner, self.lineno, parent, self.child)
+        return self._resolve(runner, runner._get_variable(parent or self.parent))
 
+    def _resolve(self, runner: "Runtime", value: "VPObject") -> "VPObject":
+        """
+        gets every attribute of the chain, starting from the value of the parent
+        """
+        value = self._lookup(runner, value, 0)
         if self.appended_children:
-            for child in self.appended_children:
-                result = getattr(result, child.name, None)
-
-                if result is None:
-                    raise errors.ViperAttributeError(runner, self.lineno, result, self.child)
+            for index in range(1, len(self.appended_children) + 1):
+                value = self._lookup(runner, value, index)
+
+        return value
+
+    def _lookup(self, runner: "Runtime", receiver: "VPObject", index: int) -> "VPObject":
+        """
+        gets one attribute of the chain. Each attribute is an inline cache, remembering how it was found on the last
+        type of object it was looked up on, so lookups on wrapped python objects skip the wrapper's ``__getattr__``.
+        Only the type and the way to look the attribute up are kept on the node, never an object.
+        Private names always go through the normal lookup, so the wrappers keep rejecting them
+        """
+        child = self.child if index == 0 else self.appended_children[index - 1]
+        cache = self._cache
+        if cache is None:
+            cache = self._cache = [None] * (1 + len(self.appended_children or ()))
+
+        entry = cache[index]
+        typ = type(receiver)
+        if entry is None or entry[0] is not typ:
+            if child.name.startswith("_"):
+                getter = _get_attribute
+            elif typ is objects.PyNativeObjectWrapper:
+                getter = _get_native_attribute
+            elif typ is objects.PyObjectWrapper:
+                getter = _get_wrapped_attribute
+            else:
+                getter = _get_attribute
+
+            entry = cache[index] = typ, getter
+
+        result = entry[1](runner, receiver, child.name, (self, index))
+        if result is None:
+            raise errors.ViperAttributeError(runner, self.lineno, receiver, child)
 
         return result
 
@@ -150,6 +237,9 @@ class Argument(Statement):
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime", maybe_arg: Optional["CallArgument"]) -> Optional[objects.VPObject]:
+        return self.execute_sync(runner, maybe_arg)
+
+    def execute_sync(self, runner: "Runtime", maybe_arg: Optional["CallArgument"]) -> Optional[objects.VPObject]:
         if maybe_arg is None and self.default:
             return self.default
         elif maybe_arg is None and self.optional:
@@ -157,34 +247,38 @@ class Argument(Statement):
         elif maybe_arg is None:
             return None
 
-        if isinstance(maybe_arg.value, PrimaryWrapper):
-            return await maybe_arg.execute(runner)
-
-        return await runner.get_variable(maybe_arg.value)
+        return maybe_arg.execute_sync(runner)
 
     def __eq__(self, other):
         return isinstance(other, Argument) and other.name == self.name and other.optional == self.optional
 
 
 class CallArgument(Statement):
-    __slots__ = "position", "value", "index", "type"
+    __slots__ = "position", "value"
 
     def __init__(self, position: int, value: Union[Statement, objects.Primary], lineno: int, offset: int):
         self.position = position
         self.value = value
-        self.index = -1
-        self.type = "IDENTIFIER"
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
         if isinstance(self.value, objects.Primary):
             return self.value
 
+        if self.value.sync:
+            return self.value.execute_sync(runner)
+
         return await self.value.execute(runner)
 
+    def execute_sync(self, runner: "Runtime"):
+        if isinstance(self.value, objects.Primary):
+            return self.value
+
+        return self.value.execute_sync(runner)
+
 
 class Function(Statement):
-    __slots__ = "code", "arguments", "static", "name", "matches"
+    __slots__ = "code", "arguments", "static", "name", "local_names"
 
     def __init__(self, name: Identifier, code: List[Statement], arguments: List[Argument], static: bool, lineno: int,
                  offset: int):
@@ -192,50 +286,102 @@ class Function(Statement):
         self.arguments = arguments
         self.static = static
         self.name = name
-        self.matches: List[objects.Function] = []
+        self.local_names: Dict[str, int] = {}  # name: slot, set by the resolver
         super().__init__(lineno, offset)
 
-    def _find(self, pos, args):
-        for arg in args:
-            if arg.position == pos:
-                return arg
-
-    async def execute(self, runner: "Runtime", args: List[CallArgument]) -> "VPObject":
-        for match in self.matches:
-            aln = len(args)
-            min_args = sum((1 for a in match._ast.arguments if not a.optional))
-            max_args = len(match._ast.arguments)
-            if min_args <= aln <= max_args:
-                return await match._ast._actual_execute(runner, args)
-
-        raise errors.ViperExecutionError(runner, self.lineno,
-                                         f"function {self.name.name} could not take such arguments: {', '.join((str(x) for x in args))}")
-
-    async def _actual_execute(self, runner: "Runtime", args: List[CallArgument]) -> "VPObject":
-        with runner.new_scope():
-            for arg in self.arguments:
-                _arg = self._find(arg.position, args)
-                value = await arg.execute(runner, _arg)
-                if value is None:
-                    raise errors.ViperExecutionError(runner, self.lineno, f"No value passed for argument '{arg.name}'")
-                elif isinstance(value, objects.Primary):
-                    value = value._copy()  # make them immutable
-
-                await runner.set_variable(arg.name, value, False)
+    async def execute(self, runner: "Runtime", args: List[CallArgument],
+                      overloads: Dict[int, objects.Function]) -> "VPObject":
+        match = self._match(runner, args, overloads)
+        return await match._ast._actual_execute(runner, args, match)
+
+    def _match(self, runner: "Runtime", args: Sequence[CallArgument],
+               overloads: Dict[int, objects.Function]) -> objects.Function:
+        match = overloads.get(len(args))
+        if match is None:
+            raise errors.ViperExecutionError(runner, self.lineno,
+                                             f"function {self.name.name} could not take such arguments: {', '.join((str(x) for x in args))}")
+
+        return match
+
+    async def _evaluate_arguments(self, runner: "Runtime", args: Sequence[CallArgument]) -> List["VPObject"]:
+        # the arguments belong to the caller, so they are evaluated before the function's frame is pushed.
+        # call arguments are numbered in order, so the n-th one is bound to the n-th parameter
+        values = []
+        count = len(args)
+        for index, arg in enumerate(self.arguments):
+            _arg = args[index] if index < count else None
+            if _arg is not None and not _arg.sync:
+                value = await _arg.execute(runner)
+            else:
+                value = arg.execute_sync(runner, _arg)
+
+            if value is None:
+                raise errors.ViperExecutionError(runner, self.lineno, f"No value passed for argument '{arg.name}'")
+
+            values.append(value)
+
+        return values
+
+    async def _actual_execute(self, runner: "Runtime", args: List[CallArgument], func: objects.Function) -> "VPObject":
+        values = await self._evaluate_arguments(runner, args)
+        runner._enter_call(self.lineno)
+        try:
+            call = _run_calls(runner, func, values)
+            if not runner.call_depth % STACK_SEGMENT:
+                call = asyncio.ensure_future(call)
+
+            return await call
+        finally:
+            runner.call_depth -= 1
 
-            return await runner._run_function_body(self.code)
+    def execute_sync(self, runner: "Runtime"):
+        # executing a function statement defines the function. Calls go through execute
+        runner._define_function(self)
+
+
+class TailCall:
+    """
+    returned by a ``return`` statement in the tail position of a function, instead of calling the function. The caller
+    runs it in place of the function that returned it, so tail calls do not grow the stack
+    """
+    __slots__ = "function", "values"
+
+    def __init__(self, function: objects.Function, values: List["VPObject"]):
+        self.function = function
+        self.values = values
+
+
+async def _run_calls(runner: "Runtime", func: objects.Function, values: List["VPObject"]) -> "VPObject":
+    # runs the function, and then every function it tail calls, in the same python frame
+    while True:
+        node = func._ast
+        frame = Frame(runner, node, func._scope)
+        for arg, value in zip(node.arguments, values):
+            frame.set_variable(runner, arg.name, value, False)
+
+        with runner.new_scope(scope=frame):
+            result = await runner._run_function_body(node.code)
+
+        if type(result) is not TailCall:
+            return result
+
+        func = result.function
+        values = result.values
 
 
 class FunctionCall(Expr):
     __slots__ = "name", "args"
 
-    def __init__(self, name: Union[Identifier, Attribute], args: List[CallArgument], lineno: int, offset: int):
+    def __init__(self, name: Union[Identifier, Attribute], args: Sequence[CallArgument], lineno: int, offset: int):
         self.name = name
         self.args = args
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
-        func = await self.name.execute(runner)
+        func = self.name.execute_sync(runner) if self.name.sync else await self.name.execute(runner)
+        return await self._call(runner, func)
+
+    async def _call(self, runner: "Runtime", func: Any):
         if isinstance(func, objects.Function):
             return await func.__getattribute__("_call")(runner, self.args)
 
@@ -243,20 +389,42 @@ class FunctionCall(Expr):
             caller = object.__getattribute__(func, "_call")
             args = []
             for arg in self.args:
-                args.append(await arg.execute(runner))
+                args.append(arg.execute_sync(runner) if arg.sync else await arg.execute(runner))
             return await caller(runner, self.lineno, *args)
 
         elif inspect.isfunction(func) or inspect.ismethod(func):
             # must be an internal function, it shouldn't need wrapped stuff. so pass a line number and the args
             args = []
             for arg in self.args:
-                args.append(await arg.execute(runner))
+                args.append(arg.execute_sync(runner) if arg.sync else await arg.execute(runner))
+
+            resp = func(runner, self.lineno, *args)
+            if inspect.isawaitable(resp):
+                resp = await resp
 
-            return await func(runner, self.lineno, *args)
+            return resp
 
         else:
             raise errors.ViperExecutionError(runner, self.name.lineno, f"{func} is not callable")
 
+    def execute_sync(self, runner: "Runtime"):
+        # only marked as sync when the function is a builtin that returns its result directly, see mark_sync
+        func = self.name.execute_sync(runner)
+        if not isinstance(func, objects.PyNativeObjectWrapper):
+            raise errors.ViperExecutionError(runner, self.name.lineno, f"{func} is not callable")
+
+        resp = func._invoke(runner, self.lineno, *(arg.execute_sync(runner) for arg in self.args))
+        if inspect.isawaitable(resp):
+            if inspect.iscoroutine(resp):
+                resp.close()
+
+            # the statements were parsed by a runtime where the name still referred to the builtin
+            raise errors.ViperExecutionError(runner, self.name.lineno,
+                                             f"{self.name.name} replaces a builtin with a function that has to be "
+                                             f"awaited, so the code has to be parsed by the runtime that replaces it")
+
+        return func._wrap(runner, self.lineno, resp)
+
 
 class If(Statement):
     __slots__ = "condition", "code", "others", "finish"
@@ -269,17 +437,30 @@ class If(Statement):
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
-        passing = await self.condition.execute(runner)
+        condition = self.condition
+        passing = condition.execute_sync(runner) if condition.sync else await condition.execute(runner)
         if passing:
             return await runner._run_function_body(self.code)
 
         for elseif in self.others:
-            if await elseif.condition.execute(runner):
+            condition = elseif.condition
+            if condition.execute_sync(runner) if condition.sync else await condition.execute(runner):
                 return await runner._run_function_body(elseif.code)
 
         if self.finish:
             return await runner._run_function_body(self.finish.code)
 
+    def execute_sync(self, runner: "Runtime"):
+        if self.condition.execute_sync(runner):
+            return runner._execute_sync(self.code)
+
+        for elseif in self.others:
+            if elseif.condition.execute_sync(runner):
+                return runner._execute_sync(elseif.code)
+
+        if self.finish:
+            return runner._execute_sync(self.finish.code)
+
 
 class ElseIf(Statement):
     __slots__ = "condition", "code"
@@ -303,16 +484,93 @@ class Else(Statement):
         super().__init__(lineno, offset)
 
 
+class While(Statement):
+    __slots__ = "condition", "code", "body_sync"
+
+    def __init__(self, condition: "Expr", block: List[Any], lineno: int, offset: int):
+        self.condition = condition
+        self.code = block
+        self.body_sync = False  # set by mark_sync. Loops are never sync themselves, so they can yield between iterations
+        super().__init__(lineno, offset)
+
+    async def execute(self, runner: "Runtime"):
+        condition = self.condition
+        code = self.code
+        while True:
+            # the check is counted as a statement, so even an empty loop runs out of budget
+            runner._charge(1, self.lineno)
+            if not (condition.execute_sync(runner) if condition.sync else await condition.execute(runner)):
+                return
+
+            if self.body_sync:
+                result = runner._execute_sync(code)
+                if runner.statements_executed >= runner._next_yield:
+                    await runner._yield()
+            else:
+                result = await runner._common_execute(code)
+
+            if result is not None:
+                return result
+
+
+class For(Statement):
+    __slots__ = "name", "iterable", "code", "body_sync"
+
+    def __init__(self, name: Identifier, iterable: "Expr", block: List[Any], lineno: int, offset: int):
+        self.name = name
+        self.iterable = iterable
+        self.code = block
+        self.body_sync = False  # set by mark_sync, as with While
+        super().__init__(lineno, offset)
+
+    def _iterate(self, runner: "Runtime", value: "VPObject") -> Iterable["VPObject"]:
+        # lists return themselves, so they are looped over without being copied
+        if not isinstance(value, objects.VPObject):
+            raise errors.ViperTypeError(runner, self.iterable.lineno, f"Cannot iterate over {value}")
+
+        return value._iter(runner, self.iterable.lineno)
+
+    async def execute(self, runner: "Runtime"):
+        iterable = self.iterable
+        value = iterable.execute_sync(runner) if iterable.sync else await iterable.execute(runner)
+        name = self.name
+        code = self.code
+        set_variable = runner._set_variable
+        for item in self._iterate(runner, value):
+            runner._charge(1, self.lineno)
+            set_variable(name, item, False)
+            if self.body_sync:
+                result = runner._execute_sync(code)
+                if runner.statements_executed >= runner._next_yield:
+                    await runner._yield()
+            else:
+                result = await runner._common_execute(code)
+
+            if result is not None:
+                return result
+
+
 class PrimaryWrapper(Statement):
-    __slots__ = "wraps", "obj"
+    __slots__ = "wraps", "value"
 
     def __init__(self, wraps: Type, obj: Any, lineno: int, offset: int):
         self.wraps = wraps
-        self.obj = obj
+        self.value = wraps(obj, lineno, None)._value  # converted once, runtimes build their objects from this
         super().__init__(lineno, offset)
 
+    @property
+    def obj(self) -> Any:
+        return self.value
+
     async def execute(self, runner: "Runtime"):
-        return self.wraps(self.obj, self.lineno, runner)
+        return self.execute_sync(runner)
+
+    def execute_sync(self, runner: "Runtime"):
+        const = runner._constants.get(self)
+        if const is None:
+            const = runner._constant(self)
+
+        return const
 
 
 class Import(Statement):
@@ -325,6 +583,9 @@ class Import(Statement):
     async def execute(self, runner: "Runtime"):
         return await runner.import_module(self.module, self.module.lineno)
 
+    def execute_sync(self, runner: "Runtime"):
+        return runner._import_module(self.module, self.module.lineno)
+
 
 class Try(Statement):
     __slots__ = "code", "catch"
@@ -335,20 +596,34 @@ class Try(Statement):
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
+        depth = len(runner.scopes)
         try:
-            await runner._common_execute(self.code)
+            return await runner._common_execute(self.code)
         except errors.ViperRaisedError as e:
+            del runner.scopes[depth:]  # the frames of the functions the error was raised from
             if self.catch is not None:
-                await runner.set_variable(Identifier("error", -1, -1), objects.String(e.message, -1, runner), True)
-                await runner._common_execute(self.catch.code)
-                runner.scope.del_variable(runner, Identifier("error", -1, -1))
+                runner._set_variable(self.catch.name, objects.String(e.message, -1, runner), True)
+                result = await runner._common_execute(self.catch.code)
+                runner._del_variable(self.catch.name)
+                return result
+
+    def execute_sync(self, runner: "Runtime"):
+        try:
+            return runner._execute_sync(self.code)
+        except errors.ViperRaisedError as e:
+            if self.catch is not None:
+                runner._set_variable(self.catch.name, objects.String(e.message, -1, runner), True)
+                result = runner._execute_sync(self.catch.code)
+                runner._del_variable(self.catch.name)
+                return result
 
 
 class Catch(Statement):
-    __slots__ = "code",
+    __slots__ = "code", "name"
 
     def __init__(self, code: List[Any], lineno: int, offset: int):
         self.code = code
+        self.name = Identifier("error", lineno, offset)  # the variable the error message is stored in
         super().__init__(lineno, offset)
 
 
@@ -360,13 +635,51 @@ class Throw(Statement):
         super().__init__(lineno, offset)
 
     async def execute(self, runner: "Runtime"):
-        value = await self.expr.execute(runner)
+        self._raise(runner, self.expr.execute_sync(runner) if self.expr.sync else await self.expr.execute(runner))
+
+    def execute_sync(self, runner: "Runtime"):
+        self._raise(runner, self.expr.execute_sync(runner))
+
+    def _raise(self, runner: "Runtime", value: Any):
         if not isinstance(value, objects.String):
             raise errors.ViperTypeError(runner, self.expr.lineno, f"Expected String, got {value}")
 
         raise errors.ViperRaisedError(runner, self.expr.lineno, value._value)
 
 
+class Return(Statement):
+    __slots__ = "expr", "tail"
+
+    def __init__(self, expr: Optional[Statement], lineno: int, offset: int):
+        self.expr = expr
+        self.tail = False  # set by the resolver, when the expression is a call that can replace the current call
+        super().__init__(lineno, offset)
+
+    async def execute(self, runner: "Runtime"):
+        expr = self.expr
+        if expr is None:
+            return runner.null
+
+        if not self.tail:
+            value = expr.execute_sync(runner) if expr.sync else await expr.execute(runner)
+            return runner.null if value is None else value
+
+        func = expr.name.execute_sync(runner) if expr.name.sync else await expr.name.execute(runner)
+        if isinstance(func, objects.Function):
+            match = func._ast._match(runner, expr.args, func._overloads)
+            return TailCall(match, await match._ast._evaluate_arguments(runner, expr.args))
+
+        value = await expr._call(runner, func)
+        return runner.null if value is None else value
+
+    def execute_sync(self, runner: "Runtime"):
+        if self.expr is None:
+            return runner.null
+
+        value = self.expr.execute_sync(runner)
+        return runner.null if value is None else value
+
+
 class Operator:
     __slots__ = ()
 
@@ -426,6 +739,22 @@ class LessOrEqual(Operator):
     pass
 
 
+# the python operation behind each operator, applied to the values of primaries
+PY_OPERATORS = {
+    Plus: operator.add,
+    Minus: operator.sub,
+    Times: operator.mul,
+    Divide: operator.floordiv,
+    Modulus: operator.mod,
+    EqualTo: operator.eq,
+    NotEqualTo: operator.ne,
+    GreaterThan: operator.gt,
+    GreaterOrEqual: operator.ge,
+    LessThan: operator.lt,
+    LessOrEqual: operator.le
+}
+
+
 def unwrap_wrapped(func):
     @functools.wraps(func)
     def wrapped(self, runner, l, r):
@@ -438,7 +767,7 @@ def unwrap_wrapped(func):
 
         resp = func(self, l, r)
         if isinstance(_l, objects.Primary):
-            return _l.__class__(resp, self.lineno, runner)
+            return runner._make_primary(_l.__class__, resp, self.lineno)
         if not isinstance(resp, objects.VPObject):
             return objects.PyObjectWrapper(runner, resp)
         return resp
@@ -503,10 +832,94 @@ class BiOperatorExpr(Expr):
         return l._cast(r, -1)
 
     async def execute(self, runner: "Runtime"):
-        left = await runner.get_variable(self.left) if isinstance(self.left, Identifier) else await self.left.execute(
-            runner)
-        right = await runner.get_variable(self.right) if isinstance(self.right,
-                                                                    Identifier) else await self.right.execute(
-            runner)
+        left = self.left.execute_sync(runner) if self.left.sync else await self.left.execute(runner)
+        right = self.right.execute_sync(runner) if self.right.sync else await self.right.execute(runner)
 
         return getattr(self, '_' + self.op.__name__)(runner, left, right)
+
+    def execute_sync(self, runner: "Runtime"):
+        return getattr(self, '_' + self.op.__name__)(runner, self.left.execute_sync(runner),
+                                                     self.right.execute_sync(runner))
+
+
+def mark_sync(node: Any, natives: AbstractSet[str] = frozenset()) -> bool:
+    """
+    Marks the node, and every node below it, with whether it can be executed without awaiting anything, in which
+    case the runtime will call its ``execute_sync`` method instead of ``execute``.
+    Function calls are only sync when they call one of ``natives`` by its global name, which must be builtins that
+    return their result directly, and that the code does not assign to.
+
+    Returns the mark given to the node.
+    """
+    if not isinstance(node, Statement):
+        return isinstance(node, objects.VPObject)
+
+    typ = type(node)
+    if typ in (Identifier, PrimaryWrapper, Attribute, Import):
+        sync = True
+
+    elif typ is Cast:
+        sync = mark_sync(node.name, natives)
+
+    elif typ is BiOperatorExpr:
+        sync = mark_sync(node.left, natives) & mark_sync(node.right, natives)
+
+    elif typ is Assignment:
+        sync = mark_sync(node.value, natives)
+
+    elif typ is CallArgument:
+        sync = mark_sync(node.value, natives)
+
+    elif typ is FunctionCall:
+        sync = mark_sync(node.name, natives)
+        sync &= type(node.name) is Identifier and node.name.depth == -1 and node.name.name in natives
+        for arg in node.args:
+            sync &= mark_sync(arg, natives)
+
+    elif typ is Throw:
+        sync = mark_sync(node.expr, natives)
+
+    elif typ is Return:
+        sync = node.expr is None or mark_sync(node.expr, natives)
+
+    elif typ is If:
+        sync = mark_sync(node.condition, natives) & _mark_block(node.code, natives)
+        for elseif in node.others:
+            sync &= mark_sync(elseif.condition, natives) & _mark_block(elseif.code, natives)
+
+        if node.finish is not None:
+            sync &= _mark_block(node.finish.code, natives)
+
+    elif typ is Try:
+        sync = _mark_block(node.code, natives)
+        if node.catch is not None:
+            sync &= _mark_block(node.catch.code, natives)
+
+    elif typ is While:
+        mark_sync(node.condition, natives)
+        node.body_sync = _mark_block(node.code, natives)
+        sync = False
+
+    elif typ is For:
+        mark_sync(node.iterable, natives)
+        node.body_sync = _mark_block(node.code, natives)
+        sync = False
+
+    elif typ is Function:
+        # defining a function never awaits, its body is marked separately for when it is called
+        _mark_block(node.code, natives)
+        sync = True
+
+    else:
+        sync = False
+
+    node.sync = sync
+    return sync
+
+
+def _mark_block(code: List[Statement], natives: AbstractSet[str]) -> bool:
+    sync = True
+    for stmt in code:
+        sync &= mark_sync(stmt, natives)
+
+    return sync
@@ -0,0 +1,104 @@
+import hashlib
+from collections import OrderedDict
+from typing import *
+
+if TYPE_CHECKING:
+    from .program import Program
+
+__all__ = "ProgramCache", "default_cache"
+
+class ProgramCache:
+    """
+    A bounded LRU cache of compiled :class:`Program` objects, keyed by a hash of the source and the filename it
+    came from.
+    Once full, the least recently used entries are evicted until both the entry and byte limits are satisfied.
+
+    Parameters
+    -----------
+    max_entries: :class:`int`
+        the maximum amount of programs to hold. Passing 0 disables the cache.
+    max_bytes: :class:`int`
+        the maximum combined size, in bytes, of the sources of the cached programs.
+    """
+    def __init__(self, max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[bytes, str], Tuple[Program, int]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"<ProgramCache entries={len(self)} bytes={self.size} hits={self.hits} misses={self.misses} " \
+               f"evictions={self.evictions}>"
+
+    @staticmethod
+    def _key(source: str, filename: str) -> Tuple[Tuple[bytes, str], int]:
+        encoded = source.encode("utf8")
+        return (hashlib.blake2b(encoded, digest_size=16).digest(), filename), len(encoded)
+
+    def get(self, source: str, filename: str = "<string>") -> Optional["Program"]:
+        """
+        returns the cached program for the given source, or None if it has not been cached.
+        :param source: the source code
+        :param filename: the filename the source belongs to
+        :return: Optional[Program]
+        """
+        key, _ = self._key(source, filename)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, source: str, filename: str, program: "Program") -> None:
+        """
+        stores a program in the cache, evicting older programs if the cache is full.
+        Programs that are larger than the byte limit by themselves are not stored.
+        :param source: the source code the program was parsed from
+        :param filename: the filename the source belongs to
+        :param program: the parsed program
+        """
+        key, size = self._key(source, filename)
+        if not self.max_entries or size > self.max_bytes:
+            return
+
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+
+        self._entries[key] = (program, size)
+        self.size += size
+
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        removes every program from the cache. The counters are not reset.
+        """
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        returns a dict of the cache counters
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+default_cache = ProgramCache()
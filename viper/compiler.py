@@ -0,0 +1,279 @@
+from typing import *
+
+from .ast import *
+
+LOAD_CONST = 0
+LOAD_VALUE = 1
+LOAD_NAME = 2
+LOAD_ATTR = 3
+STORE_NAME = 4
+DELETE_NAME = 5
+BINARY_OP = 6
+CALL = 7
+POP_TOP = 8
+JUMP = 9
+POP_JUMP_IF_FALSE = 10
+SETUP_TRY = 11
+POP_TRY = 12
+THROW = 13
+IMPORT = 14
+MAKE_FUNCTION = 15
+EVAL = 16
+EXEC = 17
+RETURN_NONE = 18
+CHARGE = 19
+RETURN_VALUE = 20
+TAIL_CALL = 21
+GET_ITER = 22
+FOR_ITER = 23
+
+# the most statements charged to the runtime's budget at a time. Also bounds how long the interpreters can run
+# before they consider yielding to the event loop
+CHARGE_SIZE = 64
+
+# indexed by opcode
+OPNAMES = (
+    "LOAD_CONST",
+    "LOAD_VALUE",
+    "LOAD_NAME",
+    "LOAD_ATTR",
+    "STORE_NAME",
+    "DELETE_NAME",
+    "BINARY_OP",
+    "CALL",
+    "POP_TOP",
+    "JUMP",
+    "POP_JUMP_IF_FALSE",
+    "SETUP_TRY",
+    "POP_TRY",
+    "THROW",
+    "IMPORT",
+    "MAKE_FUNCTION",
+    "EVAL",
+    "EXEC",
+    "RETURN_NONE",
+    "CHARGE",
+    "RETURN_VALUE",
+    "TAIL_CALL",
+    "GET_ITER",
+    "FOR_ITER"
+)
+
+__all__ = ("CodeObject", "Compiler", "compile_code", "OPNAMES", "CHARGE_SIZE", *OPNAMES)
+
+
+class CodeObject:
+    """
+    A flat list of instructions, as produced by the :class:`Compiler`. Each instruction is an ``(opcode, argument)``
+    tuple. ``functions`` maps every :class:`~viper.ast.Function` node in the compiled code to its own CodeObject,
+    and is shared between a CodeObject and every CodeObject nested in it.
+    """
+    __slots__ = "name", "instructions", "functions"
+
+    def __init__(self, name: str, functions: Dict[Function, "CodeObject"]):
+        self.name = name
+        self.instructions: List[Tuple[int, Any]] = []
+        self.functions = functions
+
+    def __repr__(self):
+        return f"<CodeObject name={self.name!r} instructions={len(self.instructions)}>"
+
+    def disassemble(self) -> str:
+        """
+        returns a human readable listing of the instructions
+        """
+        lines = []
+        for index, (op, arg) in enumerate(self.instructions):
+            lines.append(f"{index:>5} {OPNAMES[op]:<18} {'' if arg is None else arg!r}")
+
+        return "\n".join(lines)
+
+
+class Compiler:
+    """
+    Compiles the statements produced by the :class:`~viper.parser.ViperParser` into :class:`CodeObject` instances,
+    which can be executed by the :class:`~viper.vm.VirtualMachine`.
+    Nodes that have no dedicated instructions are compiled to ``EVAL``/``EXEC`` instructions, which fall back to the
+    node's own ``execute`` method.
+    """
+    def __init__(self, functions: Dict[Function, CodeObject] = None):
+        self.functions = functions if functions is not None else {}
+
+    def compile(self, code: Iterable[Statement], name: str = "<module>") -> CodeObject:
+        output = CodeObject(name, self.functions)
+        self._compile_block(output.instructions, code)
+        output.instructions.append((RETURN_NONE, None))
+        return output
+
+    def compile_function(self, node: Function) -> CodeObject:
+        code = self.functions.get(node)
+        if code is None:
+            code = self.functions[node] = self.compile(node.code, node.name.name)
+
+        return code
+
+    def _compile_block(self, out: List[Tuple[int, Any]], code: Iterable[Statement]) -> None:
+        code = list(code)
+        for index, stmt in enumerate(code):
+            if not index % CHARGE_SIZE:
+                # charged the same way the tree walking interpreter counts statements
+                out.append((CHARGE, (min(CHARGE_SIZE, len(code) - index), stmt.lineno)))
+
+            self._compile_statement(out, stmt)
+
+    def _compile_statement(self, out: List[Tuple[int, Any]], stmt: Statement) -> None:
+        typ = type(stmt)
+        if typ is Assignment:
+            self._compile_expr(out, stmt.value)
+            out.append((STORE_NAME, (stmt.name, stmt.static)))
+
+        elif typ is FunctionCall:
+            self._compile_expr(out, stmt)
+            out.append((POP_TOP, None))
+
+        elif typ is If:
+            self._compile_if(out, stmt)
+
+        elif typ is Try:
+            self._compile_try(out, stmt)
+
+        elif typ is While:
+            self._compile_while(out, stmt)
+
+        elif typ is For:
+            self._compile_for(out, stmt)
+
+        elif typ is Throw:
+            self._compile_expr(out, stmt.expr)
+            out.append((THROW, stmt))
+
+        elif typ is Return:
+            self._compile_return(out, stmt)
+
+        elif typ is Import:
+            out.append((IMPORT, stmt.module))
+
+        elif typ is Function:
+            self.compile_function(stmt)
+            out.append((MAKE_FUNCTION, stmt))
+
+        else:
+            out.append((EXEC, stmt))
+
+    def _compile_if(self, out: List[Tuple[int, Any]], stmt: If) -> None:
+        jumps = []
+        for branch in (stmt, *stmt.others):
+            self._compile_expr(out, branch.condition)
+            skip = len(out)
+            out.append(None)  # patched below, once the size of the branch is known
+            self._compile_block(out, branch.code)
+            jumps.append(len(out))
+            out.append(None)
+            out[skip] = (POP_JUMP_IF_FALSE, len(out))
+
+        if stmt.finish is not None:
+            self._compile_block(out, stmt.finish.code)
+
+        end = len(out)
+        for index in jumps:
+            out[index] = (JUMP, end)
+
+    def _compile_try(self, out: List[Tuple[int, Any]], stmt: Try) -> None:
+        setup = len(out)
+        out.append(None)
+        self._compile_block(out, stmt.code)
+        out.append((POP_TRY, None))
+        jump = len(out)
+        out.append(None)
+
+        handler = len(out)
+        catch_name = None
+        if stmt.catch is not None:
+            catch_name = stmt.catch.name
+            self._compile_block(out, stmt.catch.code)
+            out.append((DELETE_NAME, catch_name))
+
+        out[setup] = (SETUP_TRY, (handler, catch_name))
+        out[jump] = (JUMP, len(out))
+
+    def _compile_while(self, out: List[Tuple[int, Any]], stmt: While) -> None:
+        start = len(out)
+        out.append((CHARGE, (1, stmt.lineno)))  # the check is counted as a statement, as in the tree walker
+        self._compile_expr(out, stmt.condition)
+        exit = len(out)
+        out.append(None)
+        self._compile_block(out, stmt.code)
+        out.append((JUMP, start))
+        out[exit] = (POP_JUMP_IF_FALSE, len(out))
+
+    def _compile_for(self, out: List[Tuple[int, Any]], stmt: For) -> None:
+        # the iterator stays on the stack while the loop runs
+        self._compile_expr(out, stmt.iterable)
+        out.append((GET_ITER, stmt))
+        start = len(out)
+        out.append(None)
+        out.append((CHARGE, (1, stmt.lineno)))
+        out.append((STORE_NAME, (stmt.name, False)))
+        self._compile_block(out, stmt.code)
+        out.append((JUMP, start))
+        out[start] = (FOR_ITER, len(out))
+
+    def _compile_return(self, out: List[Tuple[int, Any]], stmt: Return) -> None:
+        expr = stmt.expr
+        if expr is None:
+            out.append((RETURN_VALUE, False))
+
+        elif stmt.tail:
+            # calls to viper functions replace the current frame, and anything else is called and returned normally
+            self._compile_expr(out, expr.name)
+            for arg in expr.args:
+                self._compile_expr(out, arg.value)
+
+            out.append((TAIL_CALL, (len(expr.args), expr)))
+            out.append((RETURN_VALUE, True))
+
+        else:
+            self._compile_expr(out, expr)
+            out.append((RETURN_VALUE, True))
+
+    def _compile_expr(self, out: List[Tuple[int, Any]], expr: Any) -> None:
+        typ = type(expr)
+        if typ is Identifier:
+            out.append((LOAD_NAME, expr))
+
+        elif typ is PrimaryWrapper:
+            out.append((LOAD_CONST, expr))
+
+        elif typ is Attribute:
+            out.append((LOAD_NAME, expr.parent))
+            for index in range(1 + len(expr.appended_children or ())):
+                out.append((LOAD_ATTR, (index, expr)))
+
+        elif typ is BiOperatorExpr:
+            self._compile_expr(out, expr.left)
+            self._compile_expr(out, expr.right)
+            # the python operation, used when both operands are primaries, and the node's method for anything else
+            out.append((BINARY_OP, (PY_OPERATORS[expr.op], expr, getattr(BiOperatorExpr, '_' + expr.op.__name__))))
+
+        elif typ is FunctionCall:
+            self._compile_expr(out, expr.name)
+            for arg in expr.args:
+                self._compile_expr(out, arg.value)
+
+            out.append((CALL, (len(expr.args), expr)))
+
+        elif isinstance(expr, objects.VPObject):
+            out.append((LOAD_VALUE, expr))
+
+        else:
+            out.append((EVAL, expr))
+
+
+def compile_code(code: Iterable[Statement], name: str = "<module>") -> CodeObject:
+    """
+    compiles the given statements into a :class:`CodeObject`
+    :param code: the statements to compile, as returned by :meth:`Runtime.parse`
+    :param name: the name to give the resulting CodeObject
+    :return: CodeObject
+    """
+    return Compiler().compile(code, name)
@@ -1,9 +1,12 @@
 from typing import *
-from sly.lex import Token
+
+if TYPE_CHECKING:
+    from .scanner import Token
 
 __all__ = (
     "ViperError",
     "ViperRecursionError",
+    "ViperBudgetError",
     "ViperExecutionError",
     "ViperSyntaxError",
     "ViperArgumentError",
@@ -43,8 +46,14 @@ class ViperRecursionError(ViperError):
 class ViperExecutionError(ViperError):
     pass
 
+class ViperBudgetError(ViperExecutionError):
+    """
+    raised when a script exceeds the statement or time limit of its runtime
+    """
+    pass
+
 class ViperSyntaxError(ViperError):
-    def __init__(self, token: Token, offset: int, msg: str):
+    def __init__(self, token: "Token", offset: int, msg: str):
         self._token = token
         self._offset = offset
         self.message = msg
@@ -0,0 +1,298 @@
+import asyncio
+import importlib
+import inspect
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import *
+
+from . import errors, objects, serialize
+from .cache import default_cache
+from .program import Program
+
+__all__ = "ProcessExecutor",
+
+_PLAIN = (str, int, float, bool, type(None))
+
+
+def _to_plain(value: Any) -> Any:
+    # the python value of a viper object that can be sent between processes
+    if isinstance(value, objects.Primary):
+        return value._value
+
+    if isinstance(value, objects.NULL):
+        return None
+
+    if isinstance(value, _PLAIN):
+        return value
+
+    raise TypeError(f"{value!r} cannot be sent between processes")
+
+
+def _to_object(runner, value: Any, lineno: int) -> objects.VPObject:
+    if value is None:
+        return runner.null
+
+    if isinstance(value, bool):
+        return objects.Boolean._from_value(value, lineno, runner)
+
+    if isinstance(value, (int, float)):
+        return objects.Integer._from_value(value, lineno, runner)
+
+    return objects.String._from_value(value, lineno, runner)
+
+
+def _rebuild_error(name: str, line: int, message: Optional[str]) -> errors.ViperError:
+    # viper errors reference their runtime, so they are sent between processes as their name, line and message
+    cls = getattr(errors, name, errors.ViperExecutionError)
+    error = cls.__new__(cls)
+    Exception.__init__(error, message)
+    error.runner = None
+    error.line = line
+    error.message = message
+    return error
+
+
+class _RemoteNative(objects.PyNativeObjectWrapper):
+    """
+    stands in for a native inside of a worker process. Calls are sent to the process that owns the executor,
+    and block until it replies
+    """
+    def __init__(self, bridge: tuple, name: str):
+        super().__init__(None, name)
+        self._bridge = bridge
+
+    def __str__(self):
+        return f"<RemoteNative_{self._obj}>"
+
+    __repr__ = __str__
+
+    def _invoke(self, runner, line, *args):
+        calls, replies, job, timeout = self._bridge
+        try:
+            args = [_to_plain(arg) for arg in args]
+        except TypeError as e:
+            raise errors.ViperExecutionError(runner, line, str(e))
+
+        # the reply queue is sent along, so the executor can reply even when it no longer knows the job
+        calls.put((job, self._obj, line, args, replies))
+        try:
+            ok, value = replies.get(timeout=timeout)
+        except queue.Empty:
+            raise errors.ViperExecutionError(runner, line, f"Native {self._obj} did not reply within {timeout} seconds")
+
+        if not ok:
+            raise _rebuild_error(*value)
+
+        return value
+
+    def _wrap(self, runner, line, resp):
+        return _to_object(runner, resp, line)
+
+
+def _execute(source: str, file: str, data: Optional[bytes], injected: dict, natives: dict, proxied: list,
+             bridge: tuple, options: dict) -> tuple:
+    # runs inside of a worker process. The program is only sent along once the worker has asked for it
+    program = default_cache.get(source, file)
+    if program is None:
+        if data is None:
+            return None, None
+
+        program = serialize.loads(data)
+        default_cache.put(source, file, program)
+
+    for name, (cls, value) in list(injected.items()):
+        # primaries are sent as their class and value, and everything else as is
+        injected[name] = cls._from_value(value, -1, None) if cls is not None else value
+
+    for name, (module, qualname) in natives.items():
+        native = importlib.import_module(module)
+        for attr in qualname.split("."):
+            native = getattr(native, attr)
+
+        injected[name] = native
+
+    for name in proxied:
+        injected[name] = _RemoteNative(bridge, name)
+
+    # a loop of its own, rather than asyncio.run, which python 3.6 does not have
+    loop = asyncio.new_event_loop()
+    try:
+        runtime = loop.run_until_complete(program.run(dict(injected), **options))
+    except errors.ViperError as e:
+        return False, (type(e).__name__, e.line, e.message)
+    finally:
+        loop.close()
+
+    from .lib._builtins import EXPORTS
+    output = {}
+    for name, (value, _) in runtime.globals._vars.items():
+        if name in injected or name in EXPORTS or name == "null":
+            continue
+
+        if isinstance(value, objects.Primary):
+            output[name] = value._value
+
+    return True, output
+
+
+class ProcessExecutor:
+    """
+    Runs programs in a pool of worker processes, so CPU heavy scripts can use every core.
+    Programs are only sent to a worker, in the format written by :mod:`viper.serialize`, when it does not have them in
+    its :class:`ProgramCache` yet.
+
+    Injected values must be strings, numbers, booleans, None, viper primaries, or natives. Natives created with
+    ``wraps_as_native(remote_safe=True)`` must be defined at the top level of a module, and are imported and run
+    inside of the worker. Any other native stays in this
+    process, and the worker calls it through a bridge, so only primitive values can be passed to and returned from it.
+
+    Parameters
+    -----------
+    max_workers: Optional[:class:`int`]
+        the amount of worker processes. Defaults to the amount of cores
+    mp_context: Optional[:class:`multiprocessing.context.BaseContext`]
+        the multiprocessing context to create the workers with. Defaults to the spawn context, as the bridge runs a
+        thread in this process, which makes forking unsafe
+    call_timeout: Optional[:class:`float`]
+        how long, in seconds, a worker waits for a native in this process to reply before raising ViperExecutionError.
+        Defaults to 60. None waits forever
+    """
+    def __init__(self, max_workers: int = None, mp_context=None, call_timeout: Optional[float] = 60.0):
+        self.call_timeout = call_timeout
+        self._context = mp_context or multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(max_workers, mp_context=self._context)
+        self._lock = threading.Lock()
+        self._manager = None
+        self._calls = None
+        self._listener: Optional[threading.Thread] = None
+        self._jobs: Dict[int, tuple] = {}
+        self._job_ids = itertools.count()
+
+    def _start_bridge(self) -> None:
+        with self._lock:
+            if self._manager is not None:
+                return
+
+            self._manager = self._context.Manager()
+            self._calls = self._manager.Queue()
+            self._listener = threading.Thread(target=self._listen, name="viper-executor-bridge", daemon=True)
+            self._listener.start()
+
+    def _listen(self) -> None:
+        # receives the calls workers make to proxied natives, and hands them to the event loop that submitted the job
+        while True:
+            request = self._calls.get()
+            if request is None:
+                return
+
+            job, name, line, args, replies = request
+            try:
+                entry = self._jobs.get(job)
+                if entry is None:
+                    # the job was cancelled, or timed out, while the worker was still running it
+                    raise RuntimeError("The job that made this call is no longer running")
+
+                loop, runtime, natives = entry
+                asyncio.run_coroutine_threadsafe(self._call_native(runtime, natives[name], line, args, replies), loop)
+            except Exception as e:
+                # the loop may have been closed too. Either way the worker must get a reply, and the thread must keep
+                # serving the other jobs
+                try:
+                    replies.put((False, ("ViperExecutionError", line, f"{type(e).__name__}: {e}")))
+                except Exception:
+                    pass
+
+    @staticmethod
+    async def _call_native(runtime, native: objects.PyNativeObjectWrapper, line: int, args: list, replies) -> None:
+        try:
+            resp = native._invoke(runtime, line, *(_to_object(runtime, arg, line) for arg in args))
+            if inspect.isawaitable(resp):
+                resp = await resp
+
+            reply = True, _to_plain(resp)
+        except errors.ViperError as e:
+            reply = False, (type(e).__name__, line, e.message)
+        except Exception as e:
+            reply = False, ("ViperExecutionError", line, f"{type(e).__name__}: {e}")
+
+        await asyncio.get_event_loop().run_in_executor(None, replies.put, reply)
+
+    async def run(self, program: Program, injected: dict = None, **options) -> Dict[str, Any]:
+        """
+        executes a program in a worker process.
+
+        Parameters
+        -----------
+        program: :class:`Program`
+            the program to execute
+        injected: Optional[:class:`dict`]
+            a dictionary of variables to inject into the namespace before executing the program.
+        options:
+            any extra keyword arguments to pass to the worker's :class:`Runtime`, such as ``max_statements``
+
+        Returns
+        --------
+        Dict[:class:`str`, Any] the global variables set by the program that hold a string, number or boolean
+        """
+        plain, natives, local = {}, {}, {}
+        for name, value in (injected or {}).items():
+            if isinstance(value, _PLAIN):
+                plain[name] = None, value
+            elif isinstance(value, objects.Primary):
+                plain[name] = type(value), value._value
+            elif isinstance(value, objects.PyNativeObjectWrapper) and type(value) is objects.PyNativeObjectWrapper:
+                if value._remote_safe:
+                    # the module level name of a native refers to its wrapper, so it is imported again by the worker
+                    natives[name] = value._obj.__module__, value._obj.__qualname__
+                else:
+                    local[name] = value
+            else:
+                raise TypeError(f"Cannot send {name}={value!r} to a worker process")
+
+        job = next(self._job_ids)
+        bridge = None
+        if local:
+            from .runner import Runtime
+            self._start_bridge()
+            replies = self._manager.Queue()
+            self._jobs[job] = asyncio.get_event_loop(), Runtime(program.file), local
+            bridge = self._calls, replies, job, self.call_timeout
+
+        loop = asyncio.get_event_loop()
+        try:
+            ok, result = await loop.run_in_executor(self._pool, _execute, program.source, program.file, None, plain,
+                                                    natives, list(local), bridge, options)
+            if ok is None:
+                # the worker has not loaded the program yet
+                ok, result = await loop.run_in_executor(self._pool, _execute, program.source, program.file,
+                                                        serialize.dumps(program), plain, natives, list(local), bridge,
+                                                        options)
+        finally:
+            self._jobs.pop(job, None)
+
+        if not ok:
+            raise _rebuild_error(*result)
+
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        stops the worker processes, and the bridge to them
+        :param wait: whether to wait for running programs to finish
+        """
+        self._pool.shutdown(wait)
+        with self._lock:
+            if self._manager is not None:
+                self._calls.put(None)
+                self._listener.join()
+                self._manager.shutdown()
+                self._manager = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
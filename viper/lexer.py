@@ -55,7 +55,11 @@ class ViperLexer(sly.Lexer):
         IMPORT,
         CATCH,
         THROW,
-        TRY
+        TRY,
+
+        WHILE,
+        FOR,
+        IN
     )
     ignore_comment = r'\/\/.*'
 
@@ -111,6 +115,9 @@ class ViperLexer(sly.Lexer):
     IDENTIFIER['catch'] = CATCH
     IDENTIFIER['throw'] = THROW
     IDENTIFIER['try'] = TRY
+    IDENTIFIER['while'] = WHILE
+    IDENTIFIER['for'] = FOR
+    IDENTIFIER['in'] = IN
 
     ignore = ' \t'
 
@@ -14,13 +14,20 @@ MODULES = {
     "random": False
 }
 
+# the Module object of each module that has been imported. Modules hold nothing specific to a runtime, so each one is
+# only created once per process, the first time any runtime imports it
+_loaded: typing.Dict[str, objects.Module] = {}
+
 def is_importable(module):
     return module in MODULES
 
 def import_and_parse(runner: "Runtime", lineno: int, module: str) -> objects.Module:
+    mod = _loaded.get(module)
+    if mod is not None:
+        return mod
+
     if not is_importable(module):
         raise errors.ViperModuleError(runner, lineno, f"Cannot import '{module}'")
 
-    mod = importlib.import_module(f"viper.lib.{module}")
-    mod = objects.Module(module, mod, runner)
+    mod = _loaded[module] = objects.Module(module, importlib.import_module(f"viper.lib.{module}"), None)
     return mod
\ No newline at end of file
@@ -1,7 +1,7 @@
 import inspect
 from typing import Union
 
-from viper import objects
+from viper import objects, errors
 
 @objects.wraps_as_native("says a line in the terminal")
 def say(lineno, runner, *args):
@@ -40,12 +40,41 @@ def dirobj(lineno, runner, obj: Union[objects.PyObjectWrapper, objects.Module]):
         return objects.VPDictionary(lineno, runner, default=obj._dir)
     return runner.null
 
+@objects.wraps_as_native("Creates a list. Takes an optional list, range or iterator, whose items are added to the list")
+def listobj(lineno, runner, items=None):
+    output = objects.VPList(lineno, runner)
+    if items is not None:
+        output.extend(runner, lineno, items)
+
+    return output
+
+@objects.wraps_as_native("Creates a lazy range of integers. Takes a stop, or a start and a stop, and optionally a step")
+def rangeobj(lineno, runner, *args):
+    if not 1 <= len(args) <= 3:
+        raise errors.ViperArgumentError(runner, lineno, f"Expected 1 to 3 arguments, got {len(args)}")
+
+    bounds = []
+    for arg in args:
+        if not isinstance(arg, objects.Integer) or type(arg._value) is not int:
+            raise errors.ViperArgumentError(runner, lineno, f"Expected an integer, got {arg}")
+
+        bounds.append(arg._value)
+
+    if len(bounds) == 1:
+        bounds.insert(0, 0)
+
+    if len(bounds) == 3 and bounds[2] == 0:
+        raise errors.ViperArgumentError(runner, lineno, "The step of a range can not be 0")
+
+    return objects.VPRange(runner, *bounds)
+
 EXPORTS = {
     "string": objects.String,
     "integer": objects.Integer,
     "bool": objects.Boolean,
     "dictionary": objects.VPDictionary,
-    "list": objects.VPList,
+    "list": listobj,
+    "range": rangeobj,
     "say": say,
     "help": help,
     "dir": dirobj
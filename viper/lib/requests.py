@@ -1,13 +1,18 @@
-from .. import objects
+from .. import objects, errors
 
-try:
-    import aiohttp
-except ImportError as e:
-    raise Exception("aiohttp is required to use the requests module") from e
+# aiohttp takes a long time to import, so it is only imported once a request is made
+aiohttp = None
 
 
 @objects.wraps_as_native("Fetches from an api. Takes a URL, and optionally an Authorization header. Returns a dictionary")
 async def get_request(lineno, runner, url: objects.String, authorization: objects.String = None):
+    global aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp
+        except ImportError:
+            raise errors.ViperModuleError(runner, lineno, "aiohttp is required to use the requests module") from None
+
     if not runner.session:
         runner.session = aiohttp.ClientSession()
 
@@ -1,16 +1,27 @@
 import inspect
-from typing import Union
+import sys
+from typing import Union, Iterable, Iterator
 
 from . import errors
 
-def wraps_as_native(help: str = None):
+def wraps_as_native(help: str = None, remote_safe: bool = False):
+    """
+    wraps a function or class as a native, which is called with viper objects.
+    :param help: the help text of the native
+    :param remote_safe: whether the native can be pickled and run inside of a worker process of a
+        :class:`~viper.executor.ProcessExecutor`. Other natives are called in the process that owns the executor.
+    """
     def wraps(func):
         if isinstance(func, type):
             def _wraps(*args, **kwargs):
-                return PyNativeObjectWrapper(None, func(*args, **kwargs), help)
+                native = PyNativeObjectWrapper(None, func(*args, **kwargs), help)
+                native._remote_safe = remote_safe
+                return native
             return _wraps
 
-        return PyNativeObjectWrapper(None, func, help)
+        native = PyNativeObjectWrapper(None, func, help)
+        native._remote_safe = remote_safe
+        return native
 
     return wraps
 
@@ -40,6 +51,14 @@ class VPObject:
 
         raise errors.ViperCastError(self._runner, lineno, f"Cannot cast {self} to {typ}")
 
+    def _iter(self, runner, lineno: int) -> Iterable["VPObject"]:
+        """
+        returns the items of the object, for loops and anything else that takes a sequence.
+        Objects that can be iterated over override this, and should produce their items lazily where they can.
+        Raises ViperTypeError if the object can not be iterated over
+        """
+        raise errors.ViperTypeError(runner, lineno, f"Cannot iterate over {self}")
+
 
 class NULL(VPObject):
     _help = "This is a constant object. null will be the same object everywhere."
@@ -55,6 +74,8 @@ class PyNativeObjectWrapper(VPObject):
     """
     a class to wrap objects that are designed to deal with viper objects.
     """
+    _remote_safe = False
+
     def __init__(self, runtime, obj: object, help: str = None):
         super().__init__(runtime)
         self._obj = obj
@@ -88,30 +109,50 @@ class PyNativeObjectWrapper(VPObject):
         else:
             raise ValueError(f"Cannot cast {self!r} to {typ.__name__}")
 
-    async def _call(self, runner, line, *args):
+    def _invoke(self, runner, line, *args):
+        """
+        calls the wrapped object. The result may be awaitable, and should be passed to :meth:`_wrap` once it is not.
+        """
         item = self._obj
         if not callable(item):
             raise errors.ViperExecutionError(runner, line, f"<PyObject_{item}> is not callable")
 
-        resp = item(line, runner, *args)
-        if inspect.isawaitable(resp):
-            resp = await resp
+        return item(line, runner, *args)
 
+    def _wrap(self, runner, line, resp):
         if not isinstance(resp, VPObject):
             resp = PyObjectWrapper(runner, resp)
 
         return resp
 
+    async def _call(self, runner, line, *args):
+        resp = self._invoke(runner, line, *args)
+        if inspect.isawaitable(resp):
+            resp = await resp
+
+        return self._wrap(runner, line, resp)
+
+    def _iter(self, runner, lineno: int) -> Iterable[VPObject]:
+        try:
+            items = iter(self._obj)
+        except TypeError:
+            return super()._iter(runner, lineno)
+
+        # python iterators and generators are consumed one item at a time, as the loop asks for them
+        return (self._wrap(runner, lineno, item) for item in items)
+
 class PyObjectWrapper(PyNativeObjectWrapper):
     """
     a wrapper that attempts to maintain some sort of consistency between python objects and viper objects
     """
     def __init__(self, *args):
         super(PyObjectWrapper, self).__init__(*args)
-        import viper.runner as runner
-        if isinstance(self._obj, runner.Runtime):
+        # the runner imports this module, so a runtime can only exist once the runner has been imported
+        runner = sys.modules.get("viper.runner")
+        if runner is not None and isinstance(self._obj, runner.Runtime):
             raise ValueError
-    async def _call(self, runner, line, *args):
+
+    def _invoke(self, runner, line, *args):
         item = self._obj
         if not callable(item):
             raise errors.ViperExecutionError(runner, line, f"<PyWrappedObject_{item}> is not callable")
@@ -122,12 +163,10 @@ class PyObjectWrapper(PyNativeObjectWrapper):
                 _args.append(arg._value)
             else:
                 _args.append(arg)
- 
 
-        resp = item(*_args)
-        if inspect.isawaitable(resp):
-            resp = await resp
+        return item(*_args)
 
+    def _wrap(self, runner, line, resp):
         if not isinstance(resp, VPObject):
             if isinstance(resp, str):
                 resp = String(resp, line, runner)
@@ -190,11 +229,32 @@ class Module(VPObject):
     __str__ = __repr__
 
 class Primary(VPObject):
+    """
+    The base of the basic types. Primaries are immutable, so the same object can safely be shared between variables,
+    which allows the runtime to reuse the objects created for literals and common values.
+    """
     __slots__ = "_value", "lineno", "_runner"
     def __init__(self, value, lineno: int, runner):
-        self._value = value
-        self.lineno = lineno
-        self._runner = runner
+        self._init(value, lineno, runner)
+
+    def _init(self, value, lineno: int, runner):
+        object.__setattr__(self, "_value", value)
+        object.__setattr__(self, "lineno", lineno)
+        object.__setattr__(self, "_runner", runner)
+
+    @classmethod
+    def _from_value(cls, value, lineno: int, runner):
+        """
+        creates the object from an already converted value, skipping the conversion done by the constructor
+        """
+        self = cls.__new__(cls)
+        self._init(value, lineno, runner)
+        return self
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{self.__class__.__name__} objects are immutable")
+
+    __delattr__ = __setattr__
 
     def __repr__(self):
         return f"<{self.__class__.__name__} {self._value}>"
@@ -202,15 +262,11 @@ class Primary(VPObject):
     def __str__(self):
         return str(self._value)
 
-    def _copy(self):
-        return self.__class__(self._value, self.lineno, self._runner)
-
 class String(Primary):
+    __slots__ = ()
     _help = "strings are used to represent text"
     def __init__(self, val, lineno: int, runner):
-        self._value = val.strip('"')
-        self.lineno = lineno
-        self._runner = runner
+        self._init(val.strip('"'), lineno, runner)
 
     def _cast(self, typ, lineno):
         if typ is String:
@@ -229,13 +285,14 @@ class String(Primary):
         return self._value == other._value
 
 class Integer(Primary):
+    __slots__ = ()
     def __init__(self, value, lineno: int, runner):
-        self.lineno = lineno
-        self._runner = runner
         try:
-            self._value = int(value)
+            value = int(value)
         except:
-            self._value = float(value)
+            value = float(value)
+
+        self._init(value, lineno, runner)
 
     def _cast(self, typ, lineno):
         if typ is Integer:
@@ -253,13 +310,12 @@ class Integer(Primary):
         return self._value != 0
 
 class Boolean(Primary):
+    __slots__ = ()
     def __init__(self, value, lineno: int, runner):
-        self.lineno = lineno
-        self._runner = runner
         if isinstance(value, str):
-            self._value = value.lower() == "true"
-        else:
-            self._value = value
+            value = value.lower() == "true"
+
+        self._init(value, lineno, runner)
 
     def _cast(self, typ, lineno):
         if typ is Boolean:
@@ -277,10 +333,13 @@ class Boolean(Primary):
         return self._value
     
 class Function(VPObject):
-    def __init__(self, ast, runner):
+    def __init__(self, ast, runner, scope=None):
         self._ast = ast
-        self._ast.matches.append(self)
+        self._matches = []
+        self._overloads = {}  # argument count: the overload called with that many arguments
         self._runner = runner
+        self._scope = scope  # the scope the function was defined in
+        self._add_overload(self)
 
     def __getattr__(self, item):
         return self.__getattribute__(item)
@@ -291,8 +350,20 @@ class Function(VPObject):
     def _cast(self, typ, lineno):
         raise errors.ViperCastError(self._runner, lineno, "Cannot cast Functions")
 
+    def _add_overload(self, func: "Function") -> None:
+        """
+        adds a definition of this function. Each amount of arguments is handled by the first definition that can take it
+        :param func: the definition
+        """
+        arguments = func._ast.arguments
+        required = sum(1 for a in arguments if not a.optional)
+        for count in range(required, len(arguments) + 1):
+            self._overloads.setdefault(count, func)
+
+        self._matches.append(func)
+
     async def _call(self, runner, args):
-        return await self._ast.execute(runner, args)
+        return await self._ast.execute(runner, args, self._overloads)
 
 class VPList(VPObject):
     __slots__ = "_lineno", "_list", "_max_length"
@@ -302,16 +373,18 @@ class VPList(VPObject):
         self._list = default or list()
         self._max_length = None
 
+    def _iter(self, runner, lineno: int) -> Iterable[VPObject]:
+        return self._list
+
     def append(self, _, lineno: int, item: VPObject):
         """
         adds the given item to the list.
         Raises ExecutionError if the list has a size limit and is full
         """
-        if self._max_length is not None and self._length == self._max_length:
+        if self._max_length is not None and len(self._list) == self._max_length:
             raise errors.ViperExecutionError(self._runner, lineno, "List is full")
 
         self._list.append(item)
-        self._length += 1
 
     def appendMany(self, _, lineno: int, *items: list):
         """
@@ -321,7 +394,7 @@ class VPList(VPObject):
         if not items:
             raise errors.ViperArgumentError(self._runner, lineno, "Expected at least 1 argument")
 
-        if self._max_length and len(items) + self.length(None, None) > self._max_length:
+        if self._max_length and len(items) + len(self._list) > self._max_length:
             raise errors.ViperExecutionError(self._runner, lineno, "List is full")
 
 
@@ -329,6 +402,22 @@ class VPList(VPObject):
             self._list.append(item)
 
 
+    def extend(self, runner, lineno: int, items: VPObject):
+        """
+        adds every item of the given list, range or iterator to the list, without creating a list of them first.
+        Raises ExecutionError if the list has a size limit and adding the items would cause it to go over this limit.
+        Raises TypeError if the argument can not be iterated over
+        """
+        if not isinstance(items, VPObject):
+            raise errors.ViperArgumentError(self._runner, lineno, f"Expected a list, range or iterator, got {items}")
+
+        items = list(self._list) if items is self else items._iter(runner, lineno)
+        for item in items:
+            if self._max_length is not None and len(self._list) == self._max_length:
+                raise errors.ViperExecutionError(self._runner, lineno, "List is full")
+
+            self._list.append(item)
+
     def get(self, _, lineno: int, index: Integer):
         """
         returns the item at the index.
@@ -367,8 +456,8 @@ class VPList(VPObject):
         else:
             return value
 
-    def length(self, _, __):
-        return len(self._list)
+    def length(self, runner, lineno: int):
+        return Integer(len(self._list), lineno, runner)
 
     def copy(self, _, __):
         new = VPList.__new__(VPList)
@@ -393,6 +482,9 @@ class VPDictionary(VPObject):
 
         raise errors.ViperCastError(self._runner, lineno, f"Cannot cast {self} to {typ}")
 
+    def _iter(self, runner, lineno: int) -> Iterable[VPObject]:
+        return self._dict
+
     def clear(self, runner, lineno: int):
         """
         Clears the dictionary, removing every key
@@ -436,3 +528,55 @@ class VPDictionary(VPObject):
 
     def update(self, runner, lineno, other):
         pass
+
+class VPRange(VPObject):
+    """
+    a lazy sequence of integers, from start up to, but not including, stop. Each integer is only created when it is
+    reached, so a range takes the same memory whatever its length
+    """
+    __slots__ = "_range",
+    def __init__(self, runner, start: int, stop: int, step: int = 1):
+        super(VPRange, self).__init__(runner)
+        self._range = range(start, stop, step)
+        self._help = "A lazy sequence of integers. Can be looped over, or passed to list() or list.extend()"
+
+    def __repr__(self):
+        return f"<Range {self._range.start}-{self._range.stop} step {self._range.step}>"
+
+    __str__ = __repr__
+
+    def _iter(self, runner, lineno: int) -> Iterator[Integer]:
+        make = runner._make_primary
+        for value in self._range:
+            yield make(Integer, value, lineno)
+
+    def length(self, runner, lineno: int):
+        """
+        returns the amount of integers in the range
+        """
+        return Integer(len(self._range), lineno, runner)
+
+    def get(self, runner, lineno: int, index: Integer):
+        """
+        returns the integer at the index.
+        Raises ExecutionError if the index is invalid.
+        Raises ArgumentError if the argument is not an integer
+        """
+        if not isinstance(index, Integer):
+            raise errors.ViperArgumentError(runner, lineno, f"Expected an integer, got {index}")
+
+        position = int(index._value)
+        if not 0 <= position < len(self._range):
+            if self._range:
+                error = f"The given index was out of range (valid index: 0-{len(self._range) - 1}, got {index._value})"
+            else:
+                error = f"The given index was out of range (valid index: <Range is empty>)"
+            raise errors.ViperExecutionError(runner, lineno, error)
+
+        return Integer(self._range[position], lineno, runner)
+
+    def contains(self, runner, lineno: int, value: VPObject):
+        """
+        returns a bool indicating if the integer is in the range
+        """
+        return Boolean(isinstance(value, Integer) and value._value in self._range, lineno, runner)
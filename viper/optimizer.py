@@ -0,0 +1,257 @@
+from typing import *
+
+from .ast import *
+
+__all__ = "Optimizer", "optimize"
+
+# the operators that can be evaluated at compile time, and the python operation behind each of them
+_FOLDABLE = PY_OPERATORS
+
+
+def _size(node: Any) -> int:
+    # the amount of nodes in a tree
+    if isinstance(node, list):
+        return sum(_size(x) for x in node)
+
+    if not isinstance(node, Statement):
+        return 0
+
+    return 1 + sum(_size(getattr(node, attr, None)) for attr in type(node).__slots__)
+
+
+class Optimizer:
+    """
+    An optional pass over the statements produced by the :class:`~viper.parser.ViperParser`, which runs before the
+    variables are resolved.
+
+    - operators applied to two literals are evaluated once, and replaced with the resulting literal.
+    - ``if`` statements with literal conditions are replaced with the branch that would run, or removed entirely.
+      ``while`` loops with a false literal condition are removed.
+    - references to top level ``static`` variables that are bound to a literal, and never bound again anywhere in the
+      code, are replaced with the literal.
+
+    Attributes
+    -----------
+    removed: :class:`int`
+        the amount of nodes removed from the tree
+    folded: :class:`int`
+        the amount of operators that were evaluated
+    pruned: :class:`int`
+        the amount of branches that were removed
+    inlined: :class:`int`
+        the amount of variable references that were replaced with a literal
+    """
+    def __init__(self):
+        self.removed = 0
+        self.folded = 0
+        self.pruned = 0
+        self.inlined = 0
+        self._constants: Dict[str, PrimaryWrapper] = {}
+        self._bound_once: Set[str] = set()
+
+    def optimize(self, code: List[Statement]) -> List[Statement]:
+        before = _size(code)
+        counts = {}
+        self._count_bindings(code, counts)
+        self._bound_once = {name for name, count in counts.items() if count == 1}
+
+        output = []
+        for stmt in code:
+            stmt = self._optimize_statement(stmt, output)
+            if stmt is None:
+                continue
+
+            output.append(stmt)
+            if type(stmt) is Assignment and stmt.static and type(stmt.value) is PrimaryWrapper \
+                    and stmt.name.name in self._bound_once:
+                self._constants[stmt.name.name] = stmt.value
+
+        self.removed += before - _size(output)
+        return output
+
+    def _count_bindings(self, code: List[Statement], counts: Dict[str, int]) -> None:
+        for stmt in code:
+            typ = type(stmt)
+            if typ is Assignment or typ is Function:
+                counts[stmt.name.name] = counts.get(stmt.name.name, 0) + 1
+                if typ is Function:
+                    for arg in stmt.arguments:
+                        counts[arg.name.name] = counts.get(arg.name.name, 0) + 1
+
+                    self._count_bindings(stmt.code, counts)
+
+            elif typ is Import:
+                counts[stmt.module.name] = counts.get(stmt.module.name, 0) + 1
+
+            elif typ is If:
+                self._count_bindings(stmt.code, counts)
+                for elseif in stmt.others:
+                    self._count_bindings(elseif.code, counts)
+
+                if stmt.finish is not None:
+                    self._count_bindings(stmt.finish.code, counts)
+
+            elif typ is Try:
+                self._count_bindings(stmt.code, counts)
+                if stmt.catch is not None:
+                    counts[stmt.catch.name.name] = counts.get(stmt.catch.name.name, 0) + 1
+                    self._count_bindings(stmt.catch.code, counts)
+
+            elif typ is While:
+                self._count_bindings(stmt.code, counts)
+
+            elif typ is For:
+                counts[stmt.name.name] = counts.get(stmt.name.name, 0) + 1
+                self._count_bindings(stmt.code, counts)
+
+    def _optimize_block(self, code: List[Statement]) -> List[Statement]:
+        output = []
+        for stmt in code:
+            stmt = self._optimize_statement(stmt, output)
+            if stmt is not None:
+                output.append(stmt)
+
+        code[:] = output  # blocks keep their identity, as the parser's Block objects carry positional information
+        return code
+
+    def _optimize_statement(self, stmt: Statement, output: List[Statement]) -> Optional[Statement]:
+        """
+        returns the optimized statement, or None if it should be dropped.
+        statements that are replaced with several statements are appended to the output directly.
+        """
+        typ = type(stmt)
+        if typ is Assignment:
+            stmt.value = self._optimize_expr(stmt.value)
+
+        elif typ is If:
+            return self._optimize_if(stmt, output)
+
+        elif typ is Try:
+            self._optimize_block(stmt.code)
+            if stmt.catch is not None:
+                self._optimize_block(stmt.catch.code)
+
+        elif typ is While:
+            stmt.condition = self._optimize_expr(stmt.condition)
+            if self._truth(stmt.condition) is False:
+                self.pruned += 1
+                return None
+
+            self._optimize_block(stmt.code)
+
+        elif typ is For:
+            stmt.iterable = self._optimize_expr(stmt.iterable)
+            self._optimize_block(stmt.code)
+
+        elif typ is Throw:
+            stmt.expr = self._optimize_expr(stmt.expr)
+
+        elif typ is Return:
+            if stmt.expr is not None:
+                stmt.expr = self._optimize_expr(stmt.expr)
+
+        elif typ is Function:
+            self._optimize_block(stmt.code)
+
+        elif typ is FunctionCall or typ is BiOperatorExpr or typ is Cast:
+            return self._optimize_expr(stmt)
+
+        return stmt
+
+    def _optimize_if(self, stmt: If, output: List[Statement]) -> Optional[Statement]:
+        branches = [(stmt.condition, stmt.code, stmt)]
+        branches.extend((elseif.condition, elseif.code, elseif) for elseif in stmt.others)
+        finish = stmt.finish
+
+        remaining = []
+        for index, (condition, code, node) in enumerate(branches):
+            condition = self._optimize_expr(condition)
+            constant = self._truth(condition)
+            if constant is False:
+                self.pruned += 1
+                continue
+
+            self._optimize_block(code)
+            if constant is True:
+                # this branch always runs when it is reached, so nothing after it can run
+                self.pruned += len(branches) - index - 1 + (finish is not None)
+                finish = Else(code, node.lineno, node.offset)
+                break
+
+            remaining.append((condition, code, node))
+
+        else:
+            if finish is not None:
+                self._optimize_block(finish.code)
+
+        if not remaining:
+            if finish is not None:
+                # the else block runs unconditionally, so its statements take the place of the if statement
+                output.extend(finish.code)
+
+            return None
+
+        stmt.condition, stmt.code, _ = remaining[0]
+        for condition, code, node in remaining[1:]:
+            node.condition = condition
+            node.code = code
+
+        stmt.others = [node for _, _, node in remaining[1:]]
+        stmt.finish = finish
+        return stmt
+
+    @staticmethod
+    def _truth(condition: Any) -> Optional[bool]:
+        # returns the truthiness of a literal condition, or None if the condition is not a literal
+        if type(condition) is not PrimaryWrapper:
+            return None
+
+        return bool(condition.wraps._from_value(condition.value, condition.lineno, None))
+
+    def _optimize_expr(self, expr: Any) -> Any:
+        typ = type(expr)
+        if typ is Identifier:
+            const = self._constants.get(expr.name)
+            if const is not None:
+                self.inlined += 1
+                return const
+
+        elif typ is BiOperatorExpr:
+            expr.left = self._optimize_expr(expr.left)
+            expr.right = self._optimize_expr(expr.right)
+            return self._fold(expr)
+
+        elif typ is Cast:
+            expr.name = self._optimize_expr(expr.name)
+
+        elif typ is FunctionCall:
+            for arg in expr.args:
+                arg.value = self._optimize_expr(arg.value)
+
+        return expr
+
+    def _fold(self, expr: BiOperatorExpr) -> Any:
+        left, right = expr.left, expr.right
+        func = _FOLDABLE.get(expr.op)
+        if func is None or type(left) is not PrimaryWrapper or type(right) is not PrimaryWrapper:
+            return expr
+
+        try:
+            # the result is wrapped exactly as the runtime would wrap it, leaving anything that fails to the runtime
+            folded = PrimaryWrapper(left.wraps, func(left.value, right.value), expr.lineno, expr.offset)
+        except Exception:
+            return expr
+
+        self.folded += 1
+        return folded
+
+
+def optimize(code: List[Statement]) -> Tuple[List[Statement], int]:
+    """
+    optimizes the given statements. See :class:`Optimizer`
+    :param code: the statements to optimize, as returned by :meth:`ViperParser.parse`
+    :return: Tuple[List[Statement], int] the optimized statements, and the amount of nodes that were removed
+    """
+    optimizer = Optimizer()
+    code = optimizer.optimize(code)
+    return code, optimizer.removed
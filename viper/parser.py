@@ -1,7 +1,6 @@
-import copy
 from typing import *
 
-from sly.lex import Token
+from .scanner import Token
 
 from .ast import *
 from . import objects, errors
@@ -19,8 +18,7 @@ quickmaths = {
     "MINUS": Minus,
     "MULTIPLY": Times,
     "DIVIDE": Divide,
-    "MODULUS": Modulus,
-    "CAST": Cast
+    "MODULUS": Modulus
 }
 
 quick_idents = {
@@ -31,128 +29,302 @@ quick_idents = {
     "FALSE": objects.Boolean
 }
 
-def getanyattr(obj, *names):
-    for name in names:
-        o = getattr(obj, name, ...)
-        if o is not ...:
-            return o
-
-def tokens_as_string(tokens):
-    return " ".join((t.type for t in tokens))
-
-def greedy_consume_tokens(tokens: List[Token], predicate: Callable, per_step=1):
-    ret = []
-    index = 0
-    while True:
-        toks = tokens[index:index+per_step]
-        if len(toks) != per_step:
-            break
-
-        if predicate(*toks):
-            ret.append(toks)
-            index += per_step
-        else:
-            break
+# the binding power of each binary operator. Operators with a higher binding power are applied first
+binding_powers = {
+    "EQ": 10,
+    "NE": 10,
+    "GE": 10,
+    "GT": 10,
+    "LE": 10,
+    "LT": 10,
+    "IS": 10,
+    "NOT": 10,
+    "PLUS": 20,
+    "MINUS": 20,
+    "MULTIPLY": 30,
+    "DIVIDE": 30,
+    "MODULUS": 30
+}
 
-    return ret
+# tokens that can only start a statement
+statement_tokens = {"STATIC", "FUNC", "IF", "ELIF", "ELSE", "RETURN", "EQUALS", "TRY", "CATCH", "THROW", "IMPORT", "WHILE",
+                    "FOR", "IN"}
+
+class ExpressionParser:
+    """
+    A Pratt parser for expressions. It walks the tokens of a line by index, so no token lists are copied, and builds
+    the expression in a single pass.
+    Binary operators are left associative. Comparisons bind the loosest, then addition and subtraction, then
+    multiplication, division and modulus. Calls and casts (``value as string``) bind tighter than any operator.
+
+    Parameters
+    -----------
+    tokens: List[:class:`Token`]
+        the tokens of the line
+    start: :class:`int`
+        the index of the first token of the expression
+    end: Optional[:class:`int`]
+        the index after the last token that can be part of the expression. Defaults to the end of the tokens
+    base: :class:`int`
+        the character index that the offsets of the nodes are relative to
+    """
+    __slots__ = "tokens", "pos", "end", "base"
+
+    def __init__(self, tokens: List[Union[Token, Block]], start: int, end: Optional[int], base: int):
+        self.tokens = tokens
+        self.pos = start
+        self.end = len(tokens) if end is None else end
+        self.base = base
+
+    def peek(self) -> Optional[Token]:
+        return self.tokens[self.pos] if self.pos < self.end else None
+
+    def error(self, token: Optional[Token], message: str):
+        if token is None:
+            token = self.tokens[self.end - 1]
+
+        raise errors.ViperSyntaxError(token, token.index - self.base, message)
+
+    def expect(self, typ: str, expected: str) -> Token:
+        token = self.peek()
+        if token is None:
+            self.error(None, f"Expected {expected}, got nothing")
+
+        if token.type != typ:
+            self.error(token, f"Expected {expected}, got '{token.value}'")
+
+        self.pos += 1
+        return token
+
+    def parse(self, min_power: int = 0) -> Union[Statement, objects.Primary]:
+        left = self.parse_postfix()
+        while self.pos < self.end:
+            token = self.tokens[self.pos]
+            power = binding_powers.get(token.type)
+            if power is None or power <= min_power:
+                break
 
-class Parser:
-    def __init__(self):
-        self.quick_match = getattr(self, "__quick__", None) or {}
+            self.pos += 1
+            right = self.parse(power)
+            left = BiOperatorExpr(left, quickmaths[token.type], right, left.lineno, left.offset)
 
-    def parse(self, tokens: List[Token]):
-        if not tokens:
-            raise ValueError("No tokens passed")
+        return left
 
-        # first, group tokens into blocks
-        grouped_tokens = self._group_blocks(tokens)
+    def parse_postfix(self) -> Union[Statement, objects.Primary]:
+        node = self.parse_primary()
+        while self.pos < self.end:
+            token = self.tokens[self.pos]
+            if token.type == "PAREN_OPEN":
+                self.pos += 1
+                node = FunctionCall(node, self.parse_call_args(), node.lineno, node.offset)
 
-        consumed = []
-        output = []
+            elif token.type == "CAST":
+                self.pos += 1
+                typ = self.peek()
+                if typ is None or typ.type != "IDENTIFIER":
+                    self.error(typ, f"Expected a basic type (string, integer, bool), got "
+                                    f"{'nothing' if typ is None else repr(typ.value)}")
 
-        for index, token in enumerate(grouped_tokens):
-            # consume tokens until EOL
-            if token.type != "EOL":
-                consumed.append(token)
+                self.pos += 1
+                node = Cast(node, Identifier(typ.value, typ.lineno, typ.index - self.base), node.lineno, node.offset)
 
             else:
-                if not consumed:
-                    continue
+                break
 
-                ast = self.match(consumed)
-                if isinstance(ast, tuple):
-                    if ast[1]:
-                        raise ValueError(ast)
-                    else:
-                        ast = ast[0]
+        return node
 
-                if isinstance(ast, (ElseIf, Else)):
-                    if not isinstance(output[-1], If):
-                        raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
+    def parse_primary(self) -> Union[Statement, objects.Primary]:
+        token = self.peek()
+        if token is None:
+            self.error(None, "Expected an expression, got nothing")
 
-                    if isinstance(ast, ElseIf):
-                        output[-1].others.append(ast)
+        self.pos += 1
+        typ = token.type
+        offset = token.index - self.base
+        if typ == "IDENTIFIER":
+            ident = Identifier(token.value, token.lineno, offset)
+            children = []
+            while self.pos < self.end and self.tokens[self.pos].type == "ATTR":
+                self.pos += 1
+                child = self.expect("IDENTIFIER", "an attribute name")
+                children.append(Identifier(child.value, child.lineno, child.index - self.base))
 
-                    else:
-                        if output[-1].finish is not None:
-                            raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `else` block")
+            if not children:
+                return ident
 
-                        output[-1].finish = ast
+            return Attribute(ident, children[0], token.lineno, offset, children[1:])
 
-                elif isinstance(ast, Catch):
-                    if not isinstance(output[-1], Try):
-                        raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
+        if typ in quick_idents:
+            return PrimaryWrapper(quick_idents[typ], token.value, token.lineno, offset)
 
-                    if output[-1].catch is not None:
-                        raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `catch` block")
+        if typ == "PAREN_OPEN":
+            node = self.parse()
+            self.expect("PAREN_CLOSE", "')'")
+            return node
 
-                    output[-1].catch = ast
+        if typ == "NONE":
+            return Identifier(token.value, token.lineno, offset)
 
-                else:
-                    output.append(ast)
+        if typ in statement_tokens:
+            self.error(token, f"Expected an expression, got '{token.value}'")
 
-                consumed.clear()
+        self.error(token, f"Unexpected '{token.value}'")
 
-        if consumed: # match any extras
-            ast = self.match(consumed)
-            if isinstance(ast, tuple):
-                if ast[1]:
-                    raise ValueError(ast)
-                else:
-                    ast = ast[0]
+    def parse_call_args(self) -> Tuple[CallArgument, ...]:
+        # the opening parenthesis has already been consumed
+        args = []
+        token = self.peek()
+        if token is not None and token.type == "PAREN_CLOSE":
+            self.pos += 1
+            return ()
+
+        while True:
+            token = self.peek()
+            if token is not None and token.type == "COMMA":
+                self.error(token, "Unexpected ','")
+
+            value = self.parse()
+            args.append(CallArgument(len(args), value, token.lineno, token.index - self.base))
+            token = self.peek()
+            if token is not None and token.type == "COMMA":
+                self.pos += 1
+                continue
 
-            if isinstance(ast, (ElseIf, Else)):
-                if not isinstance(output[-1], If):
-                    raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
+            self.expect("PAREN_CLOSE", "')' or ','")
+            return tuple(args)
 
-                if isinstance(ast, ElseIf):
-                    output[-1].extras.append(ast)
+class DispatchNode:
+    """
+    A node in the trie that :meth:`Parser.match` uses to find the handler of a line, keyed on token types.
+    """
+    __slots__ = "children", "handler"
 
-                else:
-                    if output[-1].finish is not None:
-                        raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `else` block")
+    def __init__(self):
+        self.children: Dict[str, "DispatchNode"] = {}
+        self.handler: Optional[Callable] = None
+
+def build_dispatch(patterns: Dict[str, Callable]) -> DispatchNode:
+    """
+    builds a trie from quickmatch patterns, which are space separated token types
+    :param patterns: a dict of pattern to handler
+    :return: DispatchNode the root of the trie
+    """
+    root = DispatchNode()
+    for pattern, handler in patterns.items():
+        node = root
+        for typ in pattern.split():
+            child = node.children.get(typ)
+            if child is None:
+                child = node.children[typ] = DispatchNode()
+
+            node = child
+
+        node.handler = handler
+
+    return root
+
+class Parser:
+    def __init__(self):
+        self.quick_match = getattr(self, "__quick__", None) or {}
+        self.dispatch = build_dispatch(self.quick_match)
+
+    def find_quickmatch(self, tokens: List[Union[Token, Block]]) -> Optional[Callable]:
+        """
+        returns the handler of the longest quickmatch pattern that the tokens start with, or None if nothing matches.
+        Only the first few tokens of the line are looked at.
+        """
+        node = self.dispatch
+        handler = None
+        for token in tokens:
+            node = node.children.get(token.type)
+            if node is None:
+                break
 
-                    output[-1].finish = ast
+            if node.handler is not None:
+                handler = node.handler
 
-            elif isinstance(ast, Catch):
-                if not isinstance(output[-1], Try):
-                    raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
+        return handler
 
-                if output[-1].catch is not None:
-                    raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `catch` block")
+    def parse(self, tokens: List[Token]):
+        if not tokens:
+            raise ValueError("No tokens passed")
+
+        return list(self.iter_parse(tokens))
 
-                output[-1].catch = ast
+    def iter_parse(self, tokens: Iterable[Token]) -> Iterator[Statement]:
+        """
+        parses the tokens lazily, yielding each top level statement as soon as it is complete.
+        Only the tokens of the current line, or of the current block, are held at any time.
+        ``if`` and ``try`` statements are held back until the next statement shows that no ``else``/``catch`` follows.
+        """
+        consumed = []
+        pending = None  # an If or Try that may still receive an elif, else or catch block
 
+        for token in self._iter_blocks(tokens):
+            # consume tokens until EOL
+            if token.type != "EOL":
+                consumed.append(token)
+                continue
+
+            if not consumed:
+                continue
+
+            ready, pending = self._complete_statement(consumed, pending)
+            yield from ready
+            consumed = []
+
+        if consumed: # match any extras
+            ready, pending = self._complete_statement(consumed, pending)
+            yield from ready
+
+        if pending is not None:
+            yield pending
+
+    def _complete_statement(self, consumed: List[Union[Token, Block]], pending: Optional[Statement]
+                            ) -> Tuple[Tuple[Statement, ...], Optional[Statement]]:
+        """
+        parses a line, attaching it to the pending statement if it is an elif, else or catch block.
+        returns the statements that are complete, and the new pending statement
+        """
+        ast = self.match(consumed)
+        if isinstance(ast, tuple):
+            if ast[1]:
+                raise ValueError(ast)
             else:
-                output.append(ast)
+                ast = ast[0]
 
-            consumed.clear()
+        if isinstance(ast, (ElseIf, Else)):
+            if not isinstance(pending, If):
+                raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
 
-        return output
+            if isinstance(ast, ElseIf):
+                pending.others.append(ast)
 
+            else:
+                if pending.finish is not None:
+                    raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `else` block")
 
-    def _group_blocks(self, tokens: List[Token]) -> List[Union[Block, Token]]:
-        output = []
+                pending.finish = ast
+
+        elif isinstance(ast, Catch):
+            if not isinstance(pending, Try):
+                raise errors.ViperSyntaxError(consumed[0], 0, f"Unexpected {ast.__class__.__name__}")
+
+            if pending.catch is not None:
+                raise errors.ViperSyntaxError(consumed[0], 0, "Can only have 1 `catch` block")
+
+            pending.catch = ast
+
+        else:
+            ready = () if pending is None else (pending,)
+            if isinstance(ast, (If, Try)):
+                return ready, ast
+
+            return (*ready, ast), None
+
+        return (), pending
+
+    def _iter_blocks(self, tokens: Iterable[Token]) -> Iterator[Union[Block, Token]]:
         current_block = None
         depth = 0
         for token in tokens:
@@ -164,7 +336,7 @@ class Parser:
                     if current_block is not None:
                         current_block.append(token)
                     else:
-                        output.append(token)
+                        yield token
 
             elif token.type == "BLOCK_CLOSE":
                 depth -= 1
@@ -172,53 +344,28 @@ class Parser:
                     raise errors.ViperSyntaxError(token, 0, "Invalid closing bracket")
 
                 if depth == 0:
-                    output.append(current_block)
+                    yield current_block
                     current_block = None
-                    output.append(dummy(token.lineno, "EOL", token.index + len(token.value)))
+                    yield dummy(token.lineno, "EOL", token.index + len(token.value))
 
                 else:
                     if current_block is not None:
                         current_block.append(token)
                     else:
-                        output.append(token)
+                        yield token
 
             else:
                 if current_block is not None:
                     current_block.append(token)
                 else:
-                    output.append(token)
+                    yield token
 
         if depth > 0:
             raise errors.ViperSyntaxError(token, 0, "Missing closing bracket") # noqa
 
-        return output
-
     def match(self, tokens: List[Union[Token, Block]]) -> Optional[Statement]:
         pass
 
-    def valid_expr(self, tokens: List[Union[Token, Block]]) -> Optional[Token]:
-        """
-        returns the first token found that is a statement token.
-        If `None` is returned, it is a valid expression
-        """
-        stmt_tokens = (
-            "STATIC",
-            "FUNC",
-            "IF",
-            "ELIF",
-            "ELSE",
-            "RETURN",
-            "EQUALS",
-            "TRY",
-            "CATCH",
-            "THROW"
-        )
-        for x in tokens:
-            if x.type in stmt_tokens:
-                return x
-
-        return None
-
     def _from_token(self, token: Token, offset: int) -> Union[Statement, objects.Primary]:
         if token.type in quick_idents:
             return PrimaryWrapper(quick_idents[token.type], token.value, token.lineno, offset)
@@ -226,116 +373,23 @@ class Parser:
         if token.type == "IDENTIFIER":
             return Identifier(token.value, token.lineno, offset)
 
-    def _consume_attr(self, it: Iterator, offset: int) -> Tuple[Optional[Attribute], Optional[Token], Iterator]:
-        new_it = copy.copy(it) # copy this just in case its a dud
-        tok0 = next(new_it)
-        if tok0.type != "IDENTIFIER":
-            return None, None, it
-
-        tok1 = next(new_it)
-        if tok1.type != "ATTR":
-            next(it)
-            return None, None, it
-
-        tok2 = next(new_it)
-        if tok2.type != "IDENTIFIER":
-            return None, None, it
-
-        extras = []
-        skipped = None
-        for tok in new_it:
-            if tok.type not in ("IDENTIFIER", "ATTR"):
-                skipped = tok
-                break
-
-            if tok.type == "IDENTIFIER":
-                extras.append(Identifier(tok.value, tok.lineno, offset + tok.index - tok0.index))
-
-        return Attribute(Identifier(tok0.value, tok0.lineno, offset),
-                               Identifier(tok2.value, tok2.lineno, offset + tok2.index - tok0.index),
-                               tok0.lineno, offset, appended_children=extras), skipped, new_it
-
-    def _parse_cast(self, tokens: List[Token], offset: int) -> Tuple[Cast, List[Token]]:
-        if len(tokens) < 3:
-            raise errors.ViperSyntaxError(tokens[-1], offset, f"Expected a cast (IDENTIFIER CAST <TYPE>), got {tokens_as_string(tokens)}")
-
-        ident = tokens[0]
-        ident = Identifier(ident.value, ident.lineno, offset)
-        _c = tokens[1]
-        if _c.type != "CAST":
-            raise errors.ViperSyntaxError(_c, offset + (_c.index - tokens[0].index), f"Expected a cast, got '{_c.value}'")
-
-        typ = tokens[2]
-        if typ.type != "IDENTIFIER":
-            raise errors.ViperSyntaxError(typ, offset + (typ.index - tokens[0].index), f"Expected a basic type (string, integer, bool), got '{typ.value}'")
-
-        return Cast(ident, Identifier(typ.value, typ.lineno, offset + (typ.index-tokens[0].index)), ident.lineno, offset), tokens[4:]
-
-    def parse_expr(self, tokens: List[Union[Token, Block]], offset=0, force_valid=False, *, terminator=None) -> Union[Statement, objects.Primary]:
-        if not force_valid:
-            maybe_stmt = self.valid_expr(tokens)
-            assert maybe_stmt is None, errors.ViperSyntaxError(maybe_stmt, offset + maybe_stmt.index - tokens[0].index,
-                                                               f"Expected a statement, got {maybe_stmt.value}")
-
-        if len(tokens) == 1:
-            r = self._from_token(tokens[0], offset) # string, bool, etc
-            if r:
-                return r
-            else:
-                return Identifier(tokens[0].value, tokens[0].lineno, offset)
-
-        it = iter(tokens)
-        if tokens[0].type == "IDENTIFIER":
-            if "CAST" in tokens_as_string(tokens):
-                parser, it = self._parse_cast(tokens, offset)
-                it = iter(it)
-                next_token = next(it, None)
-
-            else:
-                attr, skipped, it = self._consume_attr(it, offset)
-                if attr is not None:
-                    parser = attr
-                    try:
-                        next_token = next(it) if not skipped else skipped
-                    except StopIteration:
-                        next_token = None
-
-                else:
-                    parser = tokens[0]
-                    parser = Identifier(parser.value, parser.lineno, offset)
-                    try:
-                        next_token = next(it)
-                    except StopIteration:
-                        next_token = None
-
-        else:
-            n = next(it)
-            parser = self._from_token(n, offset + n.index - tokens[0].index)
-            next_token = next(it)
-
-        if not next_token or next_token.type == terminator:
-            return parser
-
-        modifier = quickmaths.get(next_token.type, None)
-        r = None
-        if not modifier:
-            if next_token.type == "PAREN_OPEN":
-                # suprise, this is actually a function call
-                parser, r = self.match(tokens)
-                if not r:
-                    return parser
-            elif tokens[-1].type == "PAREN_CLOSE":
-                tokens.pop(-1)
-                return self.parse_expr(tokens, offset, force_valid, terminator=terminator)
-            else:
-                raise ValueError("wtf", parser, next_token, modifier, tokens)
-
-        if not r:
-            r = [x for x in it]
-
-        parsee = self.parse_expr(r, force_valid=True)
+    def parse_expr(self, tokens: List[Union[Token, Block]], start: int = 0, end: int = None, *,
+                   base: int = None) -> Union[Statement, objects.Primary]:
+        """
+        parses the tokens between start and end as a single expression. See :class:`ExpressionParser`
+        :param tokens: the tokens of the line
+        :param start: the index of the first token of the expression
+        :param end: the index after the last token of the expression. Defaults to the end of the tokens
+        :param base: the character index that node offsets are relative to. Defaults to the start of the line
+        :return: the parsed expression
+        """
+        expr = ExpressionParser(tokens, start, end, tokens[0].index if base is None else base)
+        node = expr.parse()
+        if expr.pos < expr.end:
+            token = tokens[expr.pos]
+            expr.error(token, f"Unexpected '{token.value}'")
 
-        return BiOperatorExpr(parser, modifier, parsee, tokens[0].lineno, offset)
+        return node
 
     def _parse_function_args(self, tokens: List[Token], offset: int):
         output = []
@@ -401,97 +455,6 @@ class Parser:
 
         return output
 
-    def parse_function_call_args(self, tokens: List[Token], offset: int) -> Tuple[List[CallArgument], Optional[List[Token]]]:
-        output = []
-        current = []
-        start = tokens[0].index
-        depth = 0
-        index = 0
-        if tokens[0].type != "PAREN_OPEN":
-            depth = 1
-
-        math_left = None
-        math_opr = None
-
-        for index, token in enumerate(tokens):
-            if token.type == "COMMA":
-                if not current:
-                    raise errors.ViperSyntaxError(token, offset + (token.index - start), "Unexpected ','")
-
-                if math_left:
-                    left = self.parse_expr(math_left, math_left[0].index-start)
-                    right = self.parse_expr(current, current[0].index-start)
-                    output.append(
-                        CallArgument(len(output), BiOperatorExpr(left, math_opr, right, left.lineno, left.offset),
-                                     token.lineno, left.offset))
-                    math_left = None
-                    math_opr = None
-                else:
-                    output.append(
-                        CallArgument(len(output), self.parse_expr(current, current[0].index - start), token.lineno,
-                                     current[0].index - start))
-
-                current.clear()
-                continue
-
-            elif (depth > 1 and token.type not in ("PAREN_OPEN", "PAREN_CLOSE")) or token.type in ("IDENTIFIER", "ATTR", "STRING", "DECIMAL"):
-                current.append(token)
-                continue
-
-            elif token.type in quickmaths:
-                if not current:
-                    errors.ViperSyntaxError(token, offset + (token.index - start), f"Unexpected '{token.value}'")
-
-                math_left = current
-                math_opr = quickmaths[token.type]
-                current = []
-                continue
-
-            elif token.type == "PAREN_OPEN":
-                depth += 1
-                current.append(token)
-                continue
-
-            elif token.type == "PAREN_CLOSE":
-                depth -= 1
-                if depth <= 0:
-                    if current:
-                        if math_left:
-                            left = self.parse_expr(math_left, math_left[0].index - start)
-                            right = self.parse_expr(current, current[0].index - start)
-                            output.append(
-                                CallArgument(len(output),
-                                             BiOperatorExpr(left, math_opr, right, left.lineno, left.offset),
-                                             token.lineno, left.offset))
-                            math_left = None
-                            math_opr = None
-                        else:
-                            output.append(
-                                CallArgument(len(output), self.parse_expr(current, current[0].index - start), token.lineno,
-                                             current[0].index - start))
-
-                        current.clear()
-                    break
-                else:
-                    current.append(token)
-                    continue
-
-            raise ValueError("something wrong", token, token.type)
-
-        if current:
-            if math_left:
-                raise ValueError
-            # can happen when the paren_close gets sheared off of by nested function calls
-            output.append(
-                CallArgument(len(output), self.parse_expr(current, current[0].index - start), current[0].lineno,
-                             current[0].index - start))
-        if index != len(tokens):
-            remaining = tokens[index+1:]
-        else:
-            remaining = None
-
-        return output, remaining
-
     @classmethod
     def quickmatch(cls, pattern: str):
         if not hasattr(cls, "__quick__"):
@@ -509,13 +472,11 @@ class Parser:
 class ViperParser(Parser):
     def match(self, tokens):
         # first, check the quickmatches
-        stringed = tokens_as_string(tokens)
-        for q, func in self.quick_match.items():
-            if stringed.startswith(q):
-                # we've got a hit
-                return func(self, tokens)
+        func = self.find_quickmatch(tokens)
+        if func is not None:
+            return func(self, tokens)
 
-        if "PAREN_OPEN" in stringed and (stringed.startswith("IDENTIFIER")):
+        if tokens[0].type == "IDENTIFIER" and any(t.type == "PAREN_OPEN" for t in tokens):
             return self.expr_func_call(tokens)
 
         raise errors.ViperSyntaxError(tokens[0], 0, "Invalid Syntax")
@@ -541,9 +502,19 @@ class ViperParser(Parser):
 
     @Parser.quickmatch("THROW")
     def stmt_throw(self, tokens):
-        expr = self.parse_expr(tokens[1:], tokens[1].index - tokens[0].index)
+        if len(tokens) == 1:
+            raise errors.ViperSyntaxError(tokens[0], 0, "Expected an expression, got nothing")
+
+        expr = self.parse_expr(tokens, 1)
         return Throw(expr, tokens[0].lineno, 0)
 
+    @Parser.quickmatch("RETURN")
+    def stmt_return(self, tokens):
+        if len(tokens) == 1:
+            return Return(None, tokens[0].lineno, 0)
+
+        return Return(self.parse_expr(tokens, 1), tokens[0].lineno, 0)
+
     @Parser.quickmatch("CATCH")
     def stmt_catch(self, tokens):
         assert len(tokens) == 2 and isinstance(tokens[1], Block)
@@ -565,114 +536,41 @@ class ViperParser(Parser):
         return Function(name, self.parse(tokens[-1]), args, static, tokens[0].lineno, 0)
 
     @Parser.quickmatch("IDENTIFIER ATTR IDENTIFIER")
-    def q_expr_attr(self, tokens):
-        start = tokens[0].index
-        it = iter(tokens)
-        missed = None
-
-        children = []
-
-        for tok in it:
-            if tok.type not in ("IDENTIFIER", "ATTR"):
-                missed = tok
-                break
-
-            if tok.type == "ATTR":
-                continue
-
-            if tok.type == "IDENTIFIER":
-                children.append(tok)
-
-        attr = Attribute(
-                        Identifier(children[0].value, children[0].lineno, children[0].index - start),
-                        Identifier(children[1].value, children[1].lineno, children[1].index - start),
-                        children[0].lineno,
-                        0,
-                        [Identifier(x.value, x.lineno, x.index - start) for x in children[2:]])
-
-        if missed:
-            rest = [missed, *it]
-        else:
-            # nothing was missed, we probably hit the end of the tokens, so return what we have
-            return attr
-
-        if rest[0].type == "PAREN_OPEN": # function call
-            # dont pass the opening bracket
-            del rest[0]
-            return self.common_expr_func_call(attr, rest, rest[0].index-start)
-        else:
-            raise ValueError(attr, rest)
-
-
     @Parser.quickmatch("IDENTIFIER PAREN_OPEN")
-    def q_expr_func_call(self, tokens):
-        name = tokens[0]
-        name = Identifier(name.value, name.lineno, 0)
-        return self.common_expr_func_call(name, tokens[2:], tokens[2].index - tokens[0].index)
-
-    def expr_func_call(self, tokens):
-        value = []
-        start = tokens[0].index
-        it = iter(tokens)
-        missed = None
-
-        for tok in it:
-            if tok.type not in ("IDENTIFIER", "ATTR"):
-                if tok.type != "PAREN_IN":
-                    missed = tok
-                break
-
-            if tok.type == "IDENTIFIER":
-                value.append(Identifier(tok.value, tok.lineno, tok.index - start))
-
-        if len(value) > 1:
-            name = Attribute(value[0], value[1], tokens[0].lineno, 0, appended_children=value[2:])
-            vals = [missed, *(x for x in it)] if missed else [x for x in it]
-        else:
-            name = Identifier(value[0].name, value[0].lineno, value[0].offset - start)
-            vals = [missed, *(x for x in it)] if missed else [x for x in it]
-
-        return self.common_expr_func_call(name, vals, vals[0].index - start)
+    def stmt_expr(self, tokens):
+        expr = self.parse_expr(tokens)
+        if not isinstance(expr, (FunctionCall, Attribute)):
+            raise errors.ViperSyntaxError(tokens[0], 0, "Invalid Syntax")
 
+        return expr
 
-    def common_expr_func_call(self, name: Union[Identifier, Attribute], tokens, offset: int):
-        args, remaining = self.parse_function_call_args(tokens, offset)
-
-        return FunctionCall(name, args, tokens[0].lineno, offset), remaining
+    expr_func_call = stmt_expr
 
     def stmt_ifelseif_parse(self, tokens):
-        it = iter(tokens)
-        next(it)  # drop the identity
-        pin = next(it)
+        start = tokens[0].index
+        pin = tokens[1]
         if pin.type != "PAREN_OPEN":
-            raise errors.ViperSyntaxError(pin, pin.index - tokens[0].index, f"Expected '(', got '{pin.value}'")
-
-        args = []
-        for x in it:
-            if x.type == "PAREN_CLOSE":
-                args.append(x)
-                break
-
-            args.append(x)
+            raise errors.ViperSyntaxError(pin, pin.index - start, f"Expected '(', got '{pin.value}'")
 
-        values = self.parse_function_call_args(args, pin.index - tokens[0].index)[0]
-        # turns out function argument parsing is almost identical to this, with the exception that this needs exactly
-        # one argument, and it needs some sort of equality check. its pretty easy to extract the value from the returned
-        # CallArgument, so this provides a convenient method to parse the value
+        if tokens[2].type == "PAREN_CLOSE":
+            raise errors.ViperSyntaxError(pin, pin.index - start, "Expected an expression, got nothing")
 
-        if not values:
-            raise errors.ViperSyntaxError(pin, pin.index - tokens[0].index, "Expected an expression, got nothing")
+        expr = ExpressionParser(tokens, 2, len(tokens) - 1, start)
+        value = expr.parse()
+        close = expr.peek()
+        if close is not None and close.type == "COMMA":
+            raise errors.ViperSyntaxError(pin, pin.index - start, "Too many expressions for an if statement.")
 
-        if len(values) > 1:
-            raise errors.ViperSyntaxError(pin, pin.index - tokens[0].index, "Too many expressions for an if statement.")
+        expr.expect("PAREN_CLOSE", "')'")
+        if expr.pos != expr.end:
+            token = tokens[expr.pos]
+            raise errors.ViperSyntaxError(token, token.index - start, f"Unexpected '{token.value}'")
 
-        values = values[0]
-        values = values.value
-        if not isinstance(values, Expr):
-            raise errors.ViperSyntaxError(pin, pin.index - tokens[0].index,
-                                          f"Expected an expression, got <{values.__class__.__name__}>")
+        if not isinstance(value, (Expr, PrimaryWrapper)):
+            raise errors.ViperSyntaxError(pin, pin.index - start,
+                                          f"Expected an expression, got <{value.__class__.__name__}>")
 
-        return values
+        return value
 
     @Parser.quickmatch("IF")
     def stmt_if_block(self, tokens):
@@ -690,6 +588,35 @@ class ViperParser(Parser):
 
         return ElseIf(value, self.parse(tokens[-1]), tokens[0].lineno, 0)
 
+    @Parser.quickmatch("WHILE")
+    def stmt_while_block(self, tokens):
+        value = self.stmt_ifelseif_parse(tokens)
+        if not isinstance(tokens[-1], list):
+            raise errors.ViperSyntaxError(tokens[-1], tokens[-1].index - tokens[0].index, f"Expected a code block, got '{tokens[-1].type}'")
+
+        return While(value, self.parse(tokens[-1]), tokens[0].lineno, 0)
+
+    @Parser.quickmatch("FOR")
+    def stmt_for_block(self, tokens):
+        start = tokens[0].index
+        name = tokens[1] if len(tokens) > 1 else None
+        if name is None or isinstance(name, Block) or name.type != "IDENTIFIER":
+            raise errors.ViperSyntaxError(tokens[0], 0, "Expected a variable name after 'for'")
+
+        keyword = tokens[2] if len(tokens) > 2 else None
+        if keyword is None or isinstance(keyword, Block) or keyword.type != "IN":
+            raise errors.ViperSyntaxError(name, name.index - start, "Expected 'in' after the variable name")
+
+        if not isinstance(tokens[-1], list):
+            raise errors.ViperSyntaxError(tokens[-1], tokens[-1].index - start, f"Expected a code block, got '{tokens[-1].type}'")
+
+        if len(tokens) == 4:
+            raise errors.ViperSyntaxError(keyword, keyword.index - start, "Expected an expression, got nothing")
+
+        iterable = self.parse_expr(tokens, 3, len(tokens) - 1)
+        return For(Identifier(name.value, name.lineno, name.index - start), iterable, self.parse(tokens[-1]),
+                   tokens[0].lineno, 0)
+
     @Parser.quickmatch("ELSE")
     def stmt_else_block(self, tokens):
         if not isinstance(tokens[-1], list):
@@ -697,17 +624,20 @@ class ViperParser(Parser):
 
         return Else(self.parse(tokens[-1]), tokens[-1].lineno, tokens[-1].index - tokens[0].index)
 
-    # this needed to be moved below the functioncall line, or the quickmatcher would call this instead of function calls
+    # the longest matching pattern wins, so this doesn't shadow the function call and attribute patterns
     @Parser.quickmatch("IDENTIFIER")
     @Parser.quickmatch("STATIC IDENTIFIER")
     def stmt_assign(self, tokens):
         line_start = tokens[0].index
         static = tokens[0].type == "STATIC"
-        if static:
-            name = Identifier(tokens[1].value, tokens[1].lineno, tokens[1].index - line_start)
-            expr = self.parse_expr(list(tokens[3:]), tokens[3].index - line_start)
-        else:
-            name = Identifier(tokens[0].value, tokens[0].lineno, tokens[0].index - line_start)
-            expr = self.parse_expr(list(tokens[2:]), tokens[2].index - line_start)
+        name = tokens[static]
+        equals = tokens[static + 1] if len(tokens) > static + 1 else None
+        if equals is None or equals.type != "EQUALS":
+            raise errors.ViperSyntaxError(equals or name, (equals or name).index - line_start, "Expected '='")
+
+        name = Identifier(name.value, name.lineno, name.index - line_start)
+        if len(tokens) == static + 2:
+            raise errors.ViperSyntaxError(equals, equals.index - line_start, "Expected an expression, got nothing")
 
+        expr = self.parse_expr(tokens, static + 2)
         return Assignment(name, expr, tokens[0].lineno, line_start, static)
@@ -0,0 +1,94 @@
+from typing import *
+
+from . import objects
+from .runner import Runtime
+from .scope import BUILTINS
+
+__all__ = "RuntimePool",
+
+
+class RuntimePool:
+    """
+    Hands out runtimes that are ready to execute code, and takes them back once they are done, so evaluating code at a
+    high rate does not pay for creating a runtime each time.
+    The builtins and the pool's injected variables are wrapped once, into a namespace shared by every runtime of the
+    pool. Scripts that set a shared name only shadow it in their own runtime, so a runtime is reset by discarding what
+    its last execution created.
+
+    Parameters
+    -----------
+    file: :class:`str`
+        the file name given to the runtimes. Defaults to "<string>"
+    injected: Optional[:class:`dict`]
+        a dictionary of variables available to every runtime of the pool
+    size: :class:`int`
+        the most idle runtimes to keep. Runtimes released while the pool is full are discarded. Defaults to 64
+    options:
+        any extra keyword arguments to pass to each :class:`Runtime`, such as ``use_vm`` or ``max_statements``
+    """
+    def __init__(self, file: str = "<string>", injected: dict = None, *, size: int = 64, **options):
+        self.file = file
+        self.size = size
+        self.created = 0
+        self._options = options
+        self._idle: List[Runtime] = []
+        self._base = dict(BUILTINS)
+        for name, value in (injected or {}).items():
+            if not isinstance(value, objects.VPObject):
+                value = objects.PyObjectWrapper(None, value)
+
+            self._base[name] = value, True
+
+    def acquire(self) -> Runtime:
+        """
+        takes an idle runtime from the pool, or creates one if there are none
+        :return: Runtime
+        """
+        if self._idle:
+            return self._idle.pop()
+
+        runtime = Runtime(self.file, **self._options)
+        runtime._base = self._base
+        self.created += 1
+        return runtime
+
+    async def release(self, runtime: Runtime) -> None:
+        """
+        resets a runtime taken from :meth:`acquire`, and returns it to the pool
+        :param runtime: the runtime
+        """
+        await runtime.cleanup()
+        runtime.reset()
+        runtime._injected = {}
+        if len(self._idle) < self.size:
+            self._idle.append(runtime)
+
+    def runtime(self) -> "_PooledRuntime":
+        """
+        acquires a runtime for the duration of an ``async with`` block, releasing it afterwards
+        """
+        return _PooledRuntime(self)
+
+    async def run(self, source: str, *, initial_variables: dict = None) -> None:
+        """
+        runs the source code in a pooled runtime. See :meth:`Runtime.run`
+        :param source: the source code
+        :param initial_variables: variables to inject into the namespace of this run only
+        """
+        async with self.runtime() as runtime:
+            await runtime.run(source, initial_variables=initial_variables)
+
+
+class _PooledRuntime:
+    # the context manager returned by RuntimePool.runtime. contextlib.asynccontextmanager needs python 3.7
+    def __init__(self, pool: RuntimePool):
+        self._pool = pool
+        self._runtime: Optional[Runtime] = None
+
+    async def __aenter__(self) -> Runtime:
+        self._runtime = self._pool.acquire()
+        return self._runtime
+
+    async def __aexit__(self, *exc) -> None:
+        runtime, self._runtime = self._runtime, None
+        await self._pool.release(runtime)
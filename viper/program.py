@@ -0,0 +1,84 @@
+from typing import *
+
+if TYPE_CHECKING:
+    from .ast import Statement
+    from .compiler import CodeObject
+    from .runner import Runtime
+
+__all__ = "Program",
+
+class Program:
+    """
+    A piece of viper code that has been tokenized and parsed. Programs are immutable, and hold no execution state,
+    so a single Program can be executed by any number of :class:`Runtime` instances, concurrently or otherwise.
+
+    Programs should be created through :func:`viper.compile` or :meth:`Runtime.compile`, rather than directly.
+
+    Attributes
+    -----------
+    code: Tuple[:class:`Statement`]
+        the parsed statements
+    file: :class:`str`
+        the filename the code was compiled from
+    source: :class:`str`
+        the source code
+    nodes_removed: Optional[:class:`int`]
+        the amount of nodes removed by the :class:`~viper.optimizer.Optimizer`, or None if the code was not optimized
+    natives: FrozenSet[:class:`str`]
+        the builtins that the code calls without awaiting them. A :class:`Runtime` that replaces any of them parses the
+        source again before executing it
+    """
+    __slots__ = "code", "file", "source", "nodes_removed", "natives", "_bytecode"
+
+    def __init__(self, code: Iterable["Statement"], file: str, source: str, nodes_removed: int = None,
+                 natives: Iterable[str] = ()):
+        object.__setattr__(self, "code", tuple(code))
+        object.__setattr__(self, "file", file)
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "nodes_removed", nodes_removed)
+        object.__setattr__(self, "natives", frozenset(natives))
+        object.__setattr__(self, "_bytecode", None)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Program objects are immutable")
+
+    __delattr__ = __setattr__
+
+    def __repr__(self):
+        return f"<Program file={self.file!r} statements={len(self.code)}>"
+
+    @property
+    def bytecode(self) -> "CodeObject":
+        """
+        the program compiled for the :class:`~viper.vm.VirtualMachine`.
+        This is compiled the first time it is accessed.
+        """
+        if self._bytecode is None:
+            from .compiler import compile_code
+            object.__setattr__(self, "_bytecode", compile_code(self.code, self.file))
+
+        return self._bytecode
+
+    async def run(self, injected: dict = None, **kwargs) -> "Runtime":
+        """
+        Executes the program in a new :class:`Runtime`.
+
+        Parameters
+        -----------
+        injected: Optional[:class:`dict`]
+            a dictionary of variables to inject into the namespace before executing the program.
+        kwargs:
+            any extra keyword arguments to pass to the :class:`Runtime`
+
+        Returns
+        --------
+        :class:`Runtime` the :class:`Runtime` that the program was executed with
+        """
+        from .runner import Runtime
+        runtime = Runtime(self.file, injected, **kwargs)
+        try:
+            await runtime.execute(self)
+        finally:
+            await runtime.cleanup()
+
+        return runtime
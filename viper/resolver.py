@@ -0,0 +1,189 @@
+from typing import *
+
+from .ast import *
+
+__all__ = "Resolver", "resolve"
+
+
+class Resolver:
+    """
+    Resolves variables to the function frame that holds them, after parsing.
+
+    Every name that is assigned in a function, including its arguments, becomes a local of that function, and is
+    given a slot in the function's :class:`~viper.scope.Frame`. Identifiers that refer to a local of the current
+    function, or of a function it is nested in, are given the depth (how many frames up the definition chain the
+    variable lives) and slot of that local, making lookups an index into a list.
+    Any other identifier is given a depth of -1, and is looked up by name in the global scope.
+
+    ``return`` statements in a function that return the result of a call, outside of any ``try`` block, are marked as
+    tail calls.
+
+    The names assigned by the top level of the code given to :meth:`resolve` are kept in ``global_names``.
+    """
+    def __init__(self):
+        self._functions: List[Dict[str, int]] = []  # the local names of each enclosing function, innermost last
+        self._tries = 0  # the amount of try blocks around the current statement, in the current function
+        self.global_names: Set[str] = set()
+
+    def resolve(self, code: List[Statement]) -> List[Statement]:
+        self.global_names.update(self._assigned_names(code))
+        self._resolve_block(code)
+        return code
+
+    def resolve_statement(self, stmt: Statement) -> Statement:
+        """
+        resolves a single top level statement, for when the statements are produced one at a time
+        """
+        self._resolve_statement(stmt)
+        return stmt
+
+    def _resolve_block(self, code: List[Statement]) -> None:
+        for stmt in code:
+            self._resolve_statement(stmt)
+
+    def _resolve_statement(self, stmt: Statement) -> None:
+        typ = type(stmt)
+        if typ is Assignment:
+            self._resolve_expr(stmt.value)
+            self._resolve_name(stmt.name)
+
+        elif typ is If:
+            self._resolve_expr(stmt.condition)
+            self._resolve_block(stmt.code)
+            for elseif in stmt.others:
+                self._resolve_expr(elseif.condition)
+                self._resolve_block(elseif.code)
+
+            if stmt.finish is not None:
+                self._resolve_block(stmt.finish.code)
+
+        elif typ is Try:
+            self._tries += 1
+            try:
+                self._resolve_block(stmt.code)
+            finally:
+                self._tries -= 1
+
+            if stmt.catch is not None:
+                self._resolve_name(stmt.catch.name)
+                self._resolve_block(stmt.catch.code)
+
+        elif typ is While:
+            self._resolve_expr(stmt.condition)
+            self._resolve_block(stmt.code)
+
+        elif typ is For:
+            self._resolve_expr(stmt.iterable)
+            self._resolve_name(stmt.name)
+            self._resolve_block(stmt.code)
+
+        elif typ is Throw:
+            self._resolve_expr(stmt.expr)
+
+        elif typ is Return:
+            if stmt.expr is not None:
+                self._resolve_expr(stmt.expr)
+
+            # errors raised by a tail call would escape the try blocks around it, so those calls are made normally
+            stmt.tail = type(stmt.expr) is FunctionCall and bool(self._functions) and not self._tries
+
+        elif typ is Import:
+            self._resolve_name(stmt.module)
+
+        elif typ is Function:
+            self._resolve_name(stmt.name)
+            self._resolve_function(stmt)
+
+        else:
+            self._resolve_expr(stmt)
+
+    def _resolve_function(self, func: Function) -> None:
+        names = {}
+        for arg in func.arguments:
+            names.setdefault(arg.name.name, len(names))
+
+        for name in self._assigned_names(func.code):
+            names.setdefault(name, len(names))
+
+        func.local_names = names
+        self._functions.append(names)
+        tries, self._tries = self._tries, 0
+        try:
+            for arg in func.arguments:
+                self._resolve_name(arg.name)
+
+            self._resolve_block(func.code)
+        finally:
+            self._functions.pop()
+            self._tries = tries
+
+    def _assigned_names(self, code: List[Statement]) -> Iterator[str]:
+        for stmt in code:
+            typ = type(stmt)
+            if typ is Assignment or typ is Function:
+                yield stmt.name.name
+
+            elif typ is Import:
+                yield stmt.module.name
+
+            elif typ is If:
+                yield from self._assigned_names(stmt.code)
+                for elseif in stmt.others:
+                    yield from self._assigned_names(elseif.code)
+
+                if stmt.finish is not None:
+                    yield from self._assigned_names(stmt.finish.code)
+
+            elif typ is Try:
+                yield from self._assigned_names(stmt.code)
+                if stmt.catch is not None:
+                    yield stmt.catch.name.name
+                    yield from self._assigned_names(stmt.catch.code)
+
+            elif typ is While:
+                yield from self._assigned_names(stmt.code)
+
+            elif typ is For:
+                yield stmt.name.name
+                yield from self._assigned_names(stmt.code)
+
+    def _resolve_name(self, ident: Identifier) -> None:
+        for depth, names in enumerate(reversed(self._functions)):
+            slot = names.get(ident.name)
+            if slot is not None:
+                ident.depth = depth
+                ident.slot = slot
+                return
+
+        ident.depth = -1
+        ident.slot = None
+
+    def _resolve_expr(self, expr: Any) -> None:
+        typ = type(expr)
+        if typ is Identifier:
+            self._resolve_name(expr)
+
+        elif typ is Attribute:
+            self._resolve_name(expr.parent)
+
+        elif typ is BiOperatorExpr:
+            self._resolve_expr(expr.left)
+            self._resolve_expr(expr.right)
+
+        elif typ is Cast:
+            self._resolve_expr(expr.name)
+            self._resolve_expr(expr.caster)
+
+        elif typ is FunctionCall:
+            self._resolve_expr(expr.name)
+            for arg in expr.args:
+                self._resolve_expr(arg.value)
+
+
+def resolve(code: List[Statement]) -> List[Statement]:
+    """
+    resolves the variables in the given statements in place. See :class:`Resolver`
+    :param code: the statements to resolve, as returned by :meth:`Runtime.parse`
+    :return: List[Statement]
+    """
+    return Resolver().resolve(code)
@@ -1,25 +1,46 @@
+import asyncio
+import time
 from typing import *
 from contextlib import contextmanager
 
-from sly.lex import Lexer, Token
-
-from .scope import Scope, InitialScope
-from .lexer import ViperLexer
+from .scope import Scope, InitialScope, Frame, BUILTINS, SYNC_NATIVES
+from .resolver import Resolver
+from .optimizer import optimize
+from .cache import ProgramCache, default_cache
+from .program import Program
+from .compiler import compile_code, CHARGE_SIZE
+from .vm import VirtualMachine
+from .scanner import ViperScanner, Token
 from .parser import ViperParser
 from .ast import *
 from . import lib
 
+if TYPE_CHECKING:
+    from sly.lex import Lexer
+
 _quick_exec = (
     Assignment,
     FunctionCall,
     If,
     Import,
     Try,
-    Throw
+    Throw,
+    Return,
+    While,
+    For
 )
 
+# the statements that stop the block they are in when they return something, which is then returned by the block
+_returning = (Return, If, Try, While, For)
+
+# the default limit on how deeply viper functions can call each other
+DEFAULT_MAX_DEPTH = 10000
+
 class Runtime:
-    def __init__(self, file: str = "<string>", injected: dict = None, *, allow_unsafe_imports: bool = False):
+    def __init__(self, file: str = "<string>", injected: dict = None, *, allow_unsafe_imports: bool = False,
+                 cache: ProgramCache = None, use_vm: bool = False, optimize: bool = False,
+                 max_statements: int = None, max_depth: Optional[int] = DEFAULT_MAX_DEPTH, timeout: float = None,
+                 quantum: int = 1000):
         self.scopes: List[Scope] = []
         injected = injected or {}
         self._injected = injected
@@ -29,21 +50,67 @@ class Runtime:
         self.null = objects.NULL(self)
         self.allow_unsafe_imports = allow_unsafe_imports
         self.session = None
+        self.cache = cache if cache is not None else default_cache
+        self.use_vm = use_vm
+        self.optimize = optimize
+        self.nodes_removed: Optional[int] = None
+        self._natives: FrozenSet[str] = frozenset()  # the builtins that the last parsed code calls without awaiting
+        self.globals: Optional[InitialScope] = None  # the global scope of the last execution
+        self._base: Optional[Mapping[str, Tuple[objects.VPObject, bool]]] = None  # see InitialScope
+        self._constants: Dict[PrimaryWrapper, objects.Primary] = {}  # the object created for each literal
+        self._interned: Dict[Tuple[type, Any], objects.Primary] = {}
+        self._wrappers: Dict[Tuple[Attribute, int], Tuple[Any, objects.PyObjectWrapper]] = {}  # see Attribute._lookup
+
+        # the execution budget. Statements are counted up to CHARGE_SIZE at a time, and the deadline is checked,
+        # and the event loop yielded to, at the same time
+        self.max_statements = max_statements
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.statements_executed = 0
+        self.call_depth = 0
+        self._deadline: Optional[float] = None
+
+        # cooperative scheduling. The event loop is yielded to after roughly every ``quantum`` statements
+        self.quantum = quantum
+        self.yields = 0
+        self.longest_slice = 0.0  # the longest time, in seconds, spent running without yielding
+        self._next_yield: Union[int, float] = float("inf")
+        self._slice_start = 0.0
 
     @property
     def scope(self):
         return self.scopes[-1]
 
-    def tokenize(self, source: str, lex: Lexer=ViperLexer()) -> List[Token]:
+    def tokenize(self, source: str, lex: "Lexer"=ViperScanner()) -> List[Token]:
         """
         tokenizes the source of a viper runtime
         :param source: the source code
-        :param lex: An optional lexer to use instead of the ViperLexer. Only recommended if you know what youre doing.
+        :param lex: An optional lexer to use instead of the ViperScanner, such as the sly based ViperLexer.
+            Only recommended if you know what youre doing.
         :return: List[Token]
         """
         self.raw_code = source
         return lex.tokenize(source)
 
+    def tokenize_lines(self, lines: Iterable[str], lex: "Lexer"=ViperScanner()) -> Iterator[Token]:
+        """
+        lazily tokenizes source that is read a line at a time, such as an open file. Only the current line is held
+        :param lines: the lines of the source code, including their line endings
+        :param lex: An optional lexer to use instead of the ViperScanner, such as the sly based ViperLexer.
+            Only recommended if you know what youre doing.
+        :return: Iterator[Token]
+        """
+        self.raw_code = None
+        lineno = 1
+        index = 0
+        for line in lines:
+            for token in lex.tokenize(line, lineno):
+                token.index += index
+                yield token
+
+            lineno += line.count("\n")
+            index += len(line)
+
     def parse(self, tokens: List[Token], parser=ViperParser()) -> List[Statement]:
         """
         turns the tokens provided by :ref:`~tokenize` into an Abstract Syntax Tree
@@ -51,41 +118,201 @@ class Runtime:
         :param parser: an optional parser to use instead of ViperParser. Only recommended if you know what youre doing.
         :return: List[Statement]
         """
-        return parser.parse(tokens)
+        ast = parser.parse(tokens)
+        if self.optimize:
+            ast, self.nodes_removed = optimize(ast)
+
+        resolver = Resolver()
+        ast = resolver.resolve(ast)
+        # builtins that the code assigns to, or that this runtime replaces, might have to be awaited
+        self._natives = SYNC_NATIVES - resolver.global_names - self._replaced_natives()
+        for stmt in ast:
+            mark_sync(stmt, self._natives)
+
+        return ast
+
+    def _replaced_natives(self) -> FrozenSet[str]:
+        """
+        the builtins in :data:`SYNC_NATIVES` that the injected variables, or the base of the global scope, replace
+        """
+        base = BUILTINS if self._base is None else self._base
+        return frozenset(name for name in SYNC_NATIVES if name in self._injected or base.get(name) is not BUILTINS[name])
+
+    def parse_stream(self, tokens: Iterable[Token], parser=ViperParser()) -> Iterator[Statement]:
+        """
+        lazily turns tokens into statements, yielding each top level statement as soon as it has been parsed.
+        The optimizer is not applied, as it needs to see the whole program, and calls to builtins are not
+        made synchronously, as a later statement could replace the builtin.
+        :param tokens: the Tokens provided by :ref:`~tokenize` or :ref:`~tokenize_lines`
+        :param parser: an optional parser to use instead of ViperParser. Only recommended if you know what youre doing.
+        :return: Iterator[Statement]
+        """
+        resolver = Resolver()
+        for stmt in parser.iter_parse(tokens):
+            resolver.resolve_statement(stmt)
+            mark_sync(stmt)
+            yield stmt
 
-    async def execute(self, ast: List[Statement] = None):
+    def compile(self, source: str) -> Program:
+        """
+        tokenizes and parses the source into a reusable :class:`Program`, using the runtime's cache when possible
+        :param source: the source code
+        :return: Program
+        """
+        program = self.cache.get(source, self.file)
+        if (program is None or (self.optimize and program.nodes_removed is None)
+                or not program.natives.isdisjoint(self._replaced_natives())):
+            tokens = [x for x in self.tokenize(source)]
+            self.nodes_removed = None
+            program = Program(self.parse(tokens), self.file, source, self.nodes_removed, self._natives)
+            self.cache.put(source, self.file, program)
+
+        return program
+
+    async def execute(self, ast: Union[Program, List[Statement]] = None):
         if self.scopes:
             raise RuntimeError("Runtime is already running!")
-        injected = {}
-        for name, inj in self._injected.items():
-            if not isinstance(inj, objects.VPObject):
-                inj = objects.PyObjectWrapper(self, inj)
 
-            injected[name] = inj
+        bytecode = None
+        if isinstance(ast, Program):
+            self.raw_code = ast.source
+            if self.use_vm:
+                bytecode = ast.bytecode
+                ast = ast.code
+            elif not ast.natives.isdisjoint(self._replaced_natives()):
+                # the program calls builtins that this runtime replaces without awaiting them
+                ast = self.parse(self.tokenize(ast.source))
+            else:
+                ast = ast.code
 
-        self._injected = injected
+        with self._initial_scope():
+            if self.use_vm:
+                await VirtualMachine(self).run(bytecode or compile_code(ast, self.file))
+            else:
+                await self._common_execute(ast)
 
-        with self.new_scope(cls=InitialScope, injected=injected):
-            await self.set_variable(Identifier("null", -1, -1), self.null, True)
-            await self._common_execute(ast)
+    async def execute_stream(self, statements: Iterable[Statement]):
+        """
+        executes statements as they are produced, such as by :ref:`~parse_stream`,
+        so execution can start before the whole source has been parsed
+        :param statements: the statements to execute
+        """
+        if self.scopes:
+            raise RuntimeError("Runtime is already running!")
+
+        with self._initial_scope():
+            for stmt in statements:
+                if self.use_vm:
+                    await VirtualMachine(self).run(compile_code((stmt,), self.file))
+                else:
+                    await self._common_execute((stmt,))
+
+                # the literal objects and wrappers are keyed by node, so keeping them would keep every parsed statement alive
+                self._constants.clear()
+                self._wrappers.clear()
+
+    def _start_budget(self) -> None:
+        self.statements_executed = 0
+        self.call_depth = 0
+        self._deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        self.yields = 0
+        self.longest_slice = 0.0
+        self._next_yield = self.quantum if self.quantum else float("inf")
+        self._slice_start = time.perf_counter()
+
+    def _end_slice(self) -> None:
+        self.longest_slice = max(self.longest_slice, time.perf_counter() - self._slice_start)
+
+    async def _yield(self) -> None:
+        """
+        lets other tasks run, once ``quantum`` statements have been executed since the last yield
+        """
+        self._end_slice()
+        self.yields += 1
+        await asyncio.sleep(0)
+        self._slice_start = time.perf_counter()
+        self._next_yield = self.statements_executed + self.quantum
+
+    def _charge(self, count: int, lineno: int) -> None:
+        """
+        counts statements against the budget of the runtime, before they are executed.
+        raises ViperBudgetError if the statement limit, or the deadline, has been exceeded
+        """
+        self.statements_executed += count
+        if self.max_statements is not None and self.statements_executed > self.max_statements:
+            raise errors.ViperBudgetError(self, lineno, f"Exceeded the limit of {self.max_statements} statements")
+
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise errors.ViperBudgetError(self, lineno, f"Exceeded the time limit of {self.timeout} seconds")
+
+    def _enter_call(self, lineno: int) -> None:
+        """
+        counts a function call against the depth limit of the runtime. The caller must decrement ``call_depth`` once
+        the function returns. raises ViperRecursionError if the limit has been exceeded
+        """
+        self.call_depth += 1
+        if self.max_depth is not None and self.call_depth > self.max_depth:
+            self.call_depth -= 1
+            raise errors.ViperRecursionError(self, lineno, f"Exceeded the maximum call depth of {self.max_depth}")
+
+    @contextmanager
+    def _initial_scope(self):
+        self._start_budget()
+        with self.new_scope(cls=InitialScope, injected=self._injected, base=self._base) as scope:
+            self.globals = scope
+            self._set_variable(Identifier("null", -1, -1), self.null, True)
+            try:
+                yield scope
+            except RecursionError:
+                # the python stack ran out before max_depth was reached
+                raise errors.ViperRecursionError(self, -1, "Exceeded the maximum call depth") from None
+            finally:
+                self._end_slice()
 
     async def cleanup(self):
         if self.session:
             await self.session.close()
+            self.session = None
 
-    async def run(self, source, *, initial_variables: dict = None):
+    def reset(self) -> None:
+        """
+        returns the runtime to the state it was created in, apart from its injected variables, so it can be reused.
+        Only the state created by the last execution is discarded, so this is cheap. :meth:`cleanup` should be
+        awaited first
+        """
+        self.scopes.clear()
+        self.globals = None
+        self.raw_code = None
+        self.modules.clear()
+        self.nodes_removed = None
+        self._constants.clear()
+        self._wrappers.clear()
+
+    async def run(self, source: Union[str, Iterable[str]], *, initial_variables: dict = None, stream: bool = False):
+        """
+        runs the source code.
+        :param source: the source code. When streaming, this can also be an iterable of lines, such as an open file
+        :param initial_variables: variables to inject into the namespace before running
+        :param stream: whether to tokenize, parse and execute the source one statement at a time, instead of parsing
+        all of it first. This bypasses the cache, and peak memory is bounded by the largest block in the source
+        """
         if initial_variables:
             self._injected.update(initial_variables)
 
-        tokens = [x for x in self.tokenize(source)]
-        ast = self.parse(tokens)
-        await self.execute(ast)
+        if stream:
+            tokens = self.tokenize(source) if isinstance(source, str) else self.tokenize_lines(source)
+            await self.execute_stream(self.parse_stream(tokens))
+        else:
+            await self.execute(self.compile(source))
+
         await self.cleanup()
 
     @contextmanager
-    def new_scope(self, cls=Scope, injected: dict=None):
-        if cls is InitialScope:
-            scope = cls(self, injected) # noqa
+    def new_scope(self, cls=Scope, injected: dict=None, scope: Scope = None, base: dict = None):
+        if scope is not None:
+            pass
+        elif cls is InitialScope:
+            scope = cls(self, injected, base) # noqa
         else:
             scope = cls(self)
         self.scopes.append(scope)
@@ -101,57 +328,151 @@ class Runtime:
 
         return scope
 
-    async def set_variable(self, ident: Identifier, value: Any, static: bool):
+    def _intern(self, cls: Type[objects.Primary], value: Any) -> Optional[objects.Primary]:
+        """
+        returns the runtime's shared object for small integers, booleans and the empty string,
+        or None for any other value.
+        """
+        if cls is objects.Integer:
+            internable = type(value) is int and -5 <= value <= 256
+        elif cls is objects.Boolean:
+            internable = type(value) is bool
+        else:
+            internable = cls is objects.String and value == ""
+
+        if not internable:
+            return None
+
+        key = (cls, value)
+        obj = self._interned.get(key)
+        if obj is None:
+            obj = self._interned[key] = cls._from_value(value, -1, self)
+
+        return obj
+
+    def _make_primary(self, cls: Type[objects.Primary], value: Any, lineno: int) -> objects.Primary:
+        obj = self._intern(cls, value)
+        if obj is None:
+            obj = cls(value, lineno, self)
+
+        return obj
+
+    def _constant(self, node: PrimaryWrapper) -> objects.Primary:
+        obj = self._intern(node.wraps, node.value)
+        if obj is None:
+            obj = node.wraps._from_value(node.value, node.lineno, self)
+
+        self._constants[node] = obj
+        return obj
+
+    def _frame_of(self, ident: Identifier) -> Frame:
         scope = self.scopes[-1]
+        for _ in range(ident.depth):
+            scope = scope.parent
+
+        return scope
+
+    def _set_variable(self, ident: Identifier, value: objects.VPObject, static: bool):
+        if ident.slot is not None:
+            self._frame_of(ident)._slots[ident.slot] = value
+        else:
+            self.scopes[-1].set_variable(self, ident, value, static)
+
+    async def set_variable(self, ident: Identifier, value: Any, static: bool):
         if isinstance(value, Statement):
             value = await value.execute(self)
 
-        scope.set_variable(self, ident, value, static)
+        self._set_variable(ident, value, static)
 
-    async def get_variable(self, ident: Union[Identifier, Attribute]) -> Optional[objects.VPObject]:
-        scopes = reversed(self.scopes)
-        base_name = ident if isinstance(ident, Identifier) else ident.parent
+    def _del_variable(self, ident: Identifier):
+        if ident.slot is not None:
+            self._frame_of(ident)._slots[ident.slot] = None
+        else:
+            self.scopes[-1].del_variable(self, ident)
 
-        for scope in scopes:
-            val = scope.get_variable(self, base_name, raise_empty=False)
+    def _lookup_name(self, ident: Identifier) -> Optional[objects.VPObject]:
+        if ident.depth == -1:
+            # resolved as a global, which is usually found without walking the scopes
+            val = self.scopes[0].get_variable(self, ident, raise_empty=False)
             if val is not None:
-                if isinstance(ident, Attribute):
-                    children = [ident.child, *ident.appended_children]
-                    for child in children:
-                        val = getattr(val, child.name)
-                        if not val:
-                            raise errors.ViperAttributeError(self, ident.lineno,
-                                                             f"Variable '{val}' has no attribute '{child.name}'",
-                                                             ident.parent, child)
+                return val
 
+        for scope in reversed(self.scopes):
+            val = scope.get_variable(self, ident, raise_empty=False)
+            if val is not None:
                 return val
 
-        raise errors.ViperNameError(self, ident.lineno, f"Variable '{ident.name}' not found")
+        return None
+
+    def _get_variable(self, ident: Union[Identifier, Attribute]) -> Optional[objects.VPObject]:
+        base_name = ident if isinstance(ident, Identifier) else ident.parent
+
+        val = None
+        if base_name.slot is not None:
+            val = self._frame_of(base_name)._slots[base_name.slot]
+
+        if val is None:
+            val = self._lookup_name(base_name)
+            if val is None:
+                raise errors.ViperNameError(self, ident.lineno, f"Variable '{base_name.name}' not found")
+
+        if isinstance(ident, Attribute):
+            val = ident._resolve(self, val)
+
+        return val
+
+    async def get_variable(self, ident: Union[Identifier, Attribute]) -> Optional[objects.VPObject]:
+        return self._get_variable(ident)
+
+    def _define_function(self, block: Function) -> None:
+        try:
+            exists = self._get_variable(block.name)
+        except errors.ViperNameError:
+            exists = None
+
+        if exists and isinstance(exists, objects.Function):
+            exists._add_overload(objects.Function(block, self, self.scopes[-1]))
+        else:
+            self._set_variable(block.name, objects.Function(block, self, self.scopes[-1]), block.static)
 
     async def _run_function_body(self, code: List[Statement]) -> Any:
         return await self._common_execute(code)
 
+    def _execute_sync(self, code: List[Statement]) -> Any:
+        for index, block in enumerate(code):
+            if not index % CHARGE_SIZE:
+                self._charge(min(CHARGE_SIZE, len(code) - index), block.lineno)
+
+            result = block.execute_sync(self)
+            if result is not None and type(block) in _returning:
+                return result
+
     async def _common_execute(self, code: List[Statement]) -> Any:
-        for block in code:
-            if type(block) in _quick_exec:
-                await block.execute(self)
+        for index, block in enumerate(code):
+            if not index % CHARGE_SIZE:
+                self._charge(min(CHARGE_SIZE, len(code) - index), block.lineno)
+                if self.statements_executed >= self._next_yield:
+                    await self._yield()
 
-            elif isinstance(block, Function):
-                try:
-                    exists = await self.get_variable(block.name)
-                except errors.ViperNameError:
-                    exists = None
+            if block.sync:
+                result = block.execute_sync(self)
 
-                if exists and isinstance(exists, objects.Function):
-                    exists._ast.matches.append(objects.Function(block, self))
-                else:
-                    await self.set_variable(block.name, objects.Function(block, self), block.static)
+            elif type(block) in _quick_exec:
+                result = await block.execute(self)
 
-                del exists
+            elif isinstance(block, Function):
+                self._define_function(block)
+                continue
 
             else:
                 raise ValueError(block)
 
-    async def import_module(self, name: Identifier, line: int):
+            if result is not None and type(block) in _returning:
+                return result
+
+    def _import_module(self, name: Identifier, line: int):
         module = lib.import_and_parse(self, line, name.name)
-        await self.set_variable(name, module, True)
+        self._set_variable(name, module, True)
+
+    async def import_module(self, name: Identifier, line: int):
+        self._import_module(name, line)
@@ -0,0 +1,164 @@
+import re
+import sys
+from typing import *
+
+from . import errors
+
+__all__ = "Token", "ViperScanner"
+
+
+class Token:
+    """
+    A lightweight token, with the same attributes as the tokens produced by sly
+    """
+    __slots__ = "type", "value", "lineno", "index", "end"
+
+    def __repr__(self):
+        return f"Token(type={self.type!r}, value={self.value!r}, lineno={self.lineno}, index={self.index}, " \
+               f"end={self.end})"
+
+
+# the rules of the ViperLexer, in the order sly tries them, with the characters each rule can start with
+_letters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_"
+_digits = "0123456789"
+_rules = (
+    ("ignore", r"[ \t]+", " \t"),
+    ("comment", r"\/\/.*", "/"),
+    ("PLUS", r"\+", "+"),
+    ("MINUS", r"-", "-"),
+    ("MULTIPLY", r"\*", "*"),
+    ("DIVIDE", r"/", "/"),
+    ("MODULUS", r"%", "%"),
+    ("EQ", r"==", "="),
+    ("NE", r"!=", "!"),
+    ("GE", r">=", ">"),
+    ("GT", r">", ">"),
+    ("LE", r"<=", "<"),
+    ("LT", r"<", "<"),
+    ("NOT", r"isnot", "i"),
+    ("ELIF", r"else if", "e"),
+    ("CAST", r"as", "a"),
+    ("ATTR", r"\.", "."),
+    ("QMARK", r"\?", "?"),
+    ("EQUALS", r"\=", "="),
+    ("COMMA", r"\,", ","),
+    ("BLOCK_OPEN", r"\{", "{"),
+    ("BLOCK_CLOSE", r"\}", "}"),
+    ("PAREN_OPEN", r"\(", "("),
+    ("PAREN_CLOSE", r"\)", ")"),
+    ("DECIMAL", r"[0-9]+", _digits),
+    ("STRING", r'".*?(?<!\\)(?:\\\\)*?"', '"'),
+    ("IDENTIFIER", r"[a-zA-Z_0-9]+", _letters + _digits),
+    ("EOL", r"\n+", "\n")
+)
+
+def _build_table() -> Dict[str, Union[str, Pattern]]:
+    """
+    maps each character that can start a token to what to do with it. Characters that can only ever be a single
+    character token map to the token type, and anything else maps to a pattern made of the rules that can start
+    with that character, in their original order.
+    """
+    rules = {}
+    for name, pattern, chars in _rules:
+        for char in chars:
+            rules.setdefault(char, []).append((name, pattern))
+
+    table = {}
+    for char, options in rules.items():
+        if len(options) == 1 and len(options[0][1].replace("\\", "")) == 1:
+            table[char] = options[0][0]
+        else:
+            table[char] = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in options))
+
+    return table
+
+_table = _build_table()
+
+_keywords = {
+    "static": "STATIC",
+    "return": "RETURN",
+    "true": "TRUE",
+    "false": "FALSE",
+    "none": "NONE",
+    "func": "FUNC",
+    "equals": "EQUALS",
+    "if": "IF",
+    "elif": "ELIF",
+    "else": "ELSE",
+    "import": "IMPORT",
+    "is": "IS",
+    "isnot": "NOT",
+    "catch": "CATCH",
+    "throw": "THROW",
+    "try": "TRY",
+    "while": "WHILE",
+    "for": "FOR",
+    "in": "IN"
+}
+
+
+class ViperScanner:
+    """
+    A hand written tokenizer for viper code, producing the same tokens as the sly based
+    :class:`~viper.lexer.ViperLexer`, with the same ``lineno`` and ``index`` values.
+    The scanner looks at the first character of each token to pick the rules that can apply to it, so single character
+    tokens skip regex matching entirely, and the few patterns that are needed are compiled once, on import.
+    """
+    __slots__ = ()
+
+    def tokenize(self, text: str, lineno: int = 1, index: int = 0) -> Iterator[Token]:
+        """
+        lazily tokenizes the text
+        :param text: the source code
+        :param lineno: the line number of the first line of the text
+        :param index: the index in the text to start at
+        :return: Iterator[Token]
+        """
+        table = _table
+        keywords = _keywords
+        length = len(text)
+        while index < length:
+            char = text[index]
+            rule = table.get(char)
+            if rule is None:
+                match = None
+            elif rule.__class__ is str:
+                tok = Token()
+                tok.type = rule
+                tok.value = char
+                tok.lineno = lineno
+                tok.index = index
+                tok.end = index = index + 1
+                yield tok
+                continue
+            else:
+                match = rule.match(text, index)
+
+            if match is None:
+                tok = Token()
+                tok.type = "ERROR"
+                tok.value = text[index:]
+                tok.lineno = lineno
+                tok.index = tok.end = index
+                raise errors.ViperSyntaxError(tok, 0, "Illegal character '%s'" % char)
+
+            typ = match.lastgroup
+            end = match.end()
+            if typ == "ignore" or typ == "comment":
+                index = end
+                continue
+
+            tok = Token()
+            tok.value = value = match.group()
+            tok.lineno = lineno
+            tok.index = index
+            tok.end = index = end
+            if typ == "IDENTIFIER":
+                typ = keywords.get(value, typ)
+                tok.value = sys.intern(value)  # names repeat a lot, and end up in every Identifier node
+
+            elif typ == "EOL":
+                lineno += len(value)
+
+            tok.type = typ
+            yield tok
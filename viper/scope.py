@@ -1,27 +1,40 @@
+import inspect
+from types import MappingProxyType
 from typing import *
 from . import objects
-from .ast import Identifier, Statement
 from .errors import ViperNameError, ViperStaticError
 from .lib._builtins import EXPORTS as _builtin_exports
 
 if TYPE_CHECKING:
+    from .ast import Identifier, Function
     from .runner import Runtime
 
-__all__ = "Scope", "InitialScope"
+__all__ = "Scope", "InitialScope", "Frame", "BUILTINS", "SYNC_NATIVES"
+
+# the builtins, shared by every global scope that is not given another base
+BUILTINS: Mapping[str, Tuple[objects.VPObject, bool]] = MappingProxyType(
+    {name: (value, True) for name, value in _builtin_exports.items()}
+)
+
+# the builtins that are natives which return their result directly, so calling them never has to be awaited
+SYNC_NATIVES: FrozenSet[str] = frozenset(
+    name for name, (value, _) in BUILTINS.items()
+    if isinstance(value, objects.PyNativeObjectWrapper) and not inspect.iscoroutinefunction(value._obj)
+)
 
 class Scope:
     def __init__(self, runtime: "Runtime"):
         self._vars = {}
         self._runtime = runtime
 
-    def set_variable(self, runner: "Runtime", item: Identifier, value: objects.VPObject, static: bool, *, force=False):
+    def set_variable(self, runner: "Runtime", item: "Identifier", value: objects.VPObject, static: bool, *, force=False):
         if item in self._vars:
             if self._vars[item.name][0] and not force:
                 raise ViperStaticError(runner, item.lineno, f"Variable '{item.name}' is static, and cannot be changed.")
 
         self._vars[item.name] = (value, static)
 
-    def get_variable(self, runner: "Runtime", item: Identifier, *, raise_empty=True):
+    def get_variable(self, runner: "Runtime", item: "Identifier", *, raise_empty=True):
         if item.name in self._vars:
             return self._vars[item.name][0]
 
@@ -29,7 +42,7 @@ class Scope:
             raise ViperNameError(runner, item.lineno, f"Variable '{item.name}' not found")
         return None
 
-    def del_variable(self, runner: "Runtime", item: Identifier, *, raise_empty=True):
+    def del_variable(self, runner: "Runtime", item: "Identifier", *, raise_empty=True):
         if item.name in self._vars:
             del self._vars[item.name]
             return
@@ -39,10 +52,67 @@ class Scope:
         return None
 
 class InitialScope(Scope):
-    def __init__(self, runtime: "Runtime", injected: dict):
+    """
+    The global scope. Names that have not been set in the scope fall through to the injected variables, and then to
+    ``base``, a mapping of ``name: (value, static)`` which defaults to :data:`BUILTINS`. Neither is written to, so
+    both can be shared between scopes, and setting one of their names shadows it in this scope only.
+    Injected python objects are wrapped the first time they are looked up, so creating the scope does not depend on the
+    amount of builtins and injected variables.
+    """
+    def __init__(self, runtime: "Runtime", injected: Mapping[str, Any],
+                 base: Mapping[str, Tuple[objects.VPObject, bool]] = None):
+        super().__init__(runtime)
+        self._injected = injected
+        self._base = BUILTINS if base is None else base
+
+    def get_variable(self, runner: "Runtime", item: "Identifier", *, raise_empty=True):
+        name = item.name
+        var = self._vars.get(name)
+        if var is None:
+            value = self._injected.get(name)
+            if value is not None:
+                if not isinstance(value, objects.VPObject):
+                    value = objects.PyObjectWrapper(runner, value)
+
+                self._vars[name] = var = value, True
+            else:
+                var = self._base.get(name)
+
+        if var is not None:
+            return var[0]
+
+        if raise_empty:
+            raise ViperNameError(runner, item.lineno, f"Variable '{item.name}' not found")
+        return None
+
+class Frame(Scope):
+    """
+    The scope of a viper function call. Variables that the resolver found in the function are stored in slots,
+    indexed by :attr:`Identifier.slot`, rather than by name. ``parent`` is the scope the function was defined in.
+    """
+    def __init__(self, runtime: "Runtime", function: "Function", parent: Scope):
         super().__init__(runtime)
-        for name, value in _builtin_exports.items():
-            self._vars[name] = value, True
+        self._names = function.local_names
+        self._slots = [None] * len(self._names)
+        self.parent = parent
+
+    def set_variable(self, runner: "Runtime", item: "Identifier", value: objects.VPObject, static: bool, *, force=False):
+        slot = self._names.get(item.name)
+        if slot is None:
+            return super().set_variable(runner, item, value, static, force=force)
+
+        self._slots[slot] = value
+
+    def get_variable(self, runner: "Runtime", item: "Identifier", *, raise_empty=True):
+        slot = self._names.get(item.name)
+        if slot is None or self._slots[slot] is None:
+            return super().get_variable(runner, item, raise_empty=raise_empty)
+
+        return self._slots[slot]
+
+    def del_variable(self, runner: "Runtime", item: "Identifier", *, raise_empty=True):
+        slot = self._names.get(item.name)
+        if slot is None or self._slots[slot] is None:
+            return super().del_variable(runner, item, raise_empty=raise_empty)
 
-        for name, value in injected.items():
-            self._vars[name] = value, True
\ No newline at end of file
+        self._slots[slot] = None
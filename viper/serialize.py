@@ -0,0 +1,279 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+from typing import *
+
+from . import ast, objects
+from .program import Program
+
+if TYPE_CHECKING:
+    from .cache import ProgramCache
+
+__all__ = "FORMAT_VERSION", "dumps", "loads", "dump", "load", "ProgramDirectory"
+
+FORMAT_VERSION = 2
+MAGIC = b"VIPR"
+
+# every class that can appear in a serialized tree. The index of a class is its code in the format, so new classes
+# must only ever be appended, and the format version bumped if a class is removed
+_NODE_TYPES = (
+    ast.Identifier,
+    ast.Assignment,
+    ast.Cast,
+    ast.Attribute,
+    ast.Argument,
+    ast.CallArgument,
+    ast.Function,
+    ast.FunctionCall,
+    ast.If,
+    ast.ElseIf,
+    ast.Else,
+    ast.PrimaryWrapper,
+    ast.Import,
+    ast.Try,
+    ast.Catch,
+    ast.Throw,
+    ast.BiOperatorExpr,
+    ast.Return,
+    ast.While,
+    ast.For
+)
+_CLASSES = (
+    objects.String,
+    objects.Integer,
+    objects.Boolean,
+    ast.Plus,
+    ast.Minus,
+    ast.Times,
+    ast.Divide,
+    ast.Modulus,
+    ast.Range,
+    ast.EqualTo,
+    ast.NotEqualTo,
+    ast.GreaterThan,
+    ast.GreaterOrEqual,
+    ast.LessThan,
+    ast.LessOrEqual
+)
+
+_TUPLE = -1
+_CLASS = -2
+_CONTAINERS = {tuple, list, dict}  # every other value is stored as is
+
+
+def _all_slots(cls: type, private: bool = False) -> Tuple[str, ...]:
+    # private slots hold caches that only make sense in the running process, so they are not stored
+    slots = []
+    for klass in reversed(cls.__mro__):
+        slots.extend(slot for slot in klass.__dict__.get("__slots__", ()) if slot.startswith("_") is private)
+
+    return tuple(slots)
+
+_NODE_SLOTS = tuple(_all_slots(cls) for cls in _NODE_TYPES)
+_NODE_PRIVATE_SLOTS = tuple(_all_slots(cls, True) for cls in _NODE_TYPES)
+_NODE_CODES = {cls: code for code, cls in enumerate(_NODE_TYPES)}
+_CLASS_CODES = {cls: code for code, cls in enumerate(_CLASSES)}
+
+# changes whenever a node gains or loses a slot, so files written by an older layout are rejected
+_SCHEMA = hashlib.blake2b(repr([(cls.__name__, slots) for cls, slots in zip(_NODE_TYPES, _NODE_SLOTS)]).encode(),
+                          digest_size=8).digest()
+
+# magic, format version, marshal version, schema
+_HEADER = struct.Struct("<4sHH8s")
+
+
+def _encode(value: Any) -> Any:
+    typ = type(value)
+    code = _NODE_CODES.get(typ)
+    if code is not None:
+        return (code, *(_encode(getattr(value, slot, None)) for slot in _NODE_SLOTS[code]))
+
+    if typ is list:
+        return [_encode(x) for x in value]
+
+    if typ is tuple:
+        return (_TUPLE, [_encode(x) for x in value])
+
+    if value is None or typ in (str, int, float, bool):
+        return value
+
+    if typ is dict:
+        return {k: _encode(v) for k, v in value.items()}
+
+    code = _CLASS_CODES.get(value) if isinstance(value, type) else None
+    if code is not None:
+        return (_CLASS, code)
+
+    raise ValueError(f"Cannot serialize {value!r}")
+
+
+def _decode(value: Any) -> Any:
+    typ = type(value)
+    if typ is tuple:
+        code = value[0]
+        if code == _TUPLE:
+            return tuple(_decode(x) for x in value[1])
+
+        if code == _CLASS:
+            return _CLASSES[value[1]]
+
+        cls = _NODE_TYPES[code]
+        node = cls.__new__(cls)
+        setattr_ = object.__setattr__
+        for slot, field in zip(_NODE_SLOTS[code], value[1:]):
+            if type(field) in _CONTAINERS:
+                field = _decode(field)
+
+            setattr_(node, slot, field)
+
+        for slot in _NODE_PRIVATE_SLOTS[code]:
+            setattr_(node, slot, None)
+
+        return node
+
+    if typ is list:
+        return [_decode(x) if type(x) in _CONTAINERS else x for x in value]
+
+    if typ is dict:
+        return {k: _decode(v) for k, v in value.items()}
+
+    return value
+
+
+def dumps(program: Program) -> bytes:
+    """
+    serializes a parsed program. The result can be turned back into a Program with :func:`loads`, without the code
+    being tokenized or parsed again.
+    :param program: the program to serialize
+    :return: bytes
+    """
+    body = (program.file, program.source, program.nodes_removed, sorted(program.natives),
+            [_encode(stmt) for stmt in program.code])
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version, _SCHEMA) + marshal.dumps(body)
+
+
+def loads(data: Union[bytes, memoryview, mmap.mmap]) -> Program:
+    """
+    loads a program serialized by :func:`dumps`.
+    raises ValueError if the data is not a serialized program, is truncated, or was written by an incompatible version
+    of viper.
+    :param data: the serialized program
+    :return: Program
+    """
+    # the view is released before returning, so a memory-mapped file can be closed straight after
+    with memoryview(data) as view:
+        if len(view) < _HEADER.size:
+            raise ValueError("Not a compiled viper program")
+
+        magic, version, marshal_version, schema = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a compiled viper program")
+
+        if version != FORMAT_VERSION or marshal_version != marshal.version or schema != _SCHEMA:
+            raise ValueError(f"Compiled program uses format version {version}, expected {FORMAT_VERSION}. "
+                             f"Recompile it from its source")
+
+        with view[_HEADER.size:] as body:
+            try:
+                file, source, nodes_removed, natives, code = marshal.loads(body)
+            except (EOFError, ValueError, TypeError):
+                raise ValueError("Compiled program is truncated or corrupted") from None
+
+    return Program([_decode(stmt) for stmt in code], file, source, nodes_removed, natives)
+
+
+def dump(program: Program, fp: BinaryIO) -> None:
+    """
+    serializes a program into a file opened in binary mode. See :func:`dumps`
+    """
+    fp.write(dumps(program))
+
+
+def load(fp: BinaryIO) -> Program:
+    """
+    loads a program from a file opened in binary mode. See :func:`loads`
+    """
+    return loads(fp.read())
+
+
+class ProgramDirectory(Mapping[str, Program]):
+    """
+    A directory of compiled programs, as written by :meth:`save`. Programs are keyed by their file name, without the
+    suffix, and are loaded the first time they are accessed by memory-mapping their file.
+
+    Parameters
+    -----------
+    path: Union[:class:`str`, :class:`os.PathLike`]
+        the directory
+    suffix: :class:`str`
+        the suffix of compiled program files. Defaults to ".vpc"
+    """
+    def __init__(self, path: Union[str, os.PathLike], suffix: str = ".vpc"):
+        self.path = os.fspath(path)
+        self.suffix = suffix
+        self._loaded: Dict[str, Program] = {}
+
+    def _filename(self, name: str) -> str:
+        return os.path.join(self.path, name + self.suffix)
+
+    def __getitem__(self, name: str) -> Program:
+        program = self._loaded.get(name)
+        if program is not None:
+            return program
+
+        try:
+            fp = open(self._filename(name), "rb")
+        except FileNotFoundError:
+            raise KeyError(name) from None
+
+        with fp:
+            # empty files can not be memory-mapped, and nothing shorter than the header is a compiled program
+            if os.fstat(fp.fileno()).st_size < _HEADER.size:
+                raise ValueError("Not a compiled viper program")
+
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                program = self._loaded[name] = loads(data)
+
+        return program
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                yield entry.name[:-len(self.suffix)]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def save(self, name: str, program: Program) -> None:
+        """
+        writes a program to the directory, replacing any program with the same name
+        :param name: the name to store the program under
+        :param program: the program to store
+        """
+        os.makedirs(self.path, exist_ok=True)
+        tmp = self._filename(name) + ".tmp"
+        with open(tmp, "wb") as fp:
+            dump(program, fp)
+
+        os.replace(tmp, self._filename(name))
+        self._loaded.pop(name, None)
+
+    def prime(self, cache: "ProgramCache" = None) -> int:
+        """
+        loads every program in the directory into a cache, so running their source code skips parsing.
+        :param cache: the cache to fill. Defaults to the shared cache
+        :return: int the amount of programs loaded
+        """
+        if cache is None:
+            from .cache import default_cache
+            cache = default_cache
+
+        count = 0
+        for name in self:
+            program = self[name]
+            cache.put(program.source, program.file, program)
+            count += 1
+
+        return count
@@ -0,0 +1,269 @@
+import inspect
+from typing import *
+
+from . import objects, errors
+from .ast import Function
+from .compiler import *
+from .scope import Frame
+
+if TYPE_CHECKING:
+    from .runner import Runtime
+
+__all__ = "VirtualMachine",
+
+_exhausted = object()
+_primaries = frozenset((objects.Integer, objects.String, objects.Boolean))
+_Integer = objects.Integer
+
+class VirtualMachine:
+    """
+    Executes :class:`~viper.compiler.CodeObject` instances in a single dispatch loop.
+    Calls to viper functions push a frame onto the machine's own frame stack instead of recursing, and tail calls
+    replace the current frame. The event loop is only yielded to when a native function returns an awaitable, or when
+    an instruction has to fall back to the tree walking interpreter.
+    """
+    __slots__ = "runner",
+
+    def __init__(self, runner: "Runtime"):
+        self.runner = runner
+
+    def _select_overload(self, func: objects.Function, args: list, lineno: int) -> objects.Function:
+        match = func._overloads.get(len(args))
+        if match is not None:
+            return match
+
+        raise errors.ViperExecutionError(self.runner, lineno,
+                                         f"function {func._ast.name.name} could not take such arguments: "
+                                         f"{', '.join((str(x) for x in args))}")
+
+    def _bind_arguments(self, target: Function, args: list, scope: Frame) -> None:
+        runner = self.runner
+        for index, argument in enumerate(target.arguments):
+            if index < len(args):
+                value = args[index]
+            elif argument.default:
+                value = argument.default
+            elif argument.optional:
+                value = runner.null
+            else:
+                raise errors.ViperExecutionError(runner, target.lineno,
+                                                 f"No value passed for argument '{argument.name}'")
+
+            scope.set_variable(runner, argument.name, value, False)
+
+    async def run(self, code: CodeObject) -> None:
+        runner = self.runner
+        scopes = runner.scopes
+        get_variable = runner._get_variable
+        set_variable = runner._set_variable
+        constants = runner._constants
+        make_primary = runner._make_primary
+        small_ints = [runner._intern(_Integer, value) for value in range(-5, 257)]
+        limited = runner.max_statements is not None or runner._deadline is not None
+        functions = code.functions
+        instructions = code.instructions
+        pc = 0
+        stack = []
+        base = 0  # the size of the stack when the current call started
+        frames = []  # (instructions, pc, handlers, base) of each caller
+        handlers = []  # (handler pc, catch name, stack size, scope count) of each active try block in this frame
+
+        while True:
+            try:
+                while True:
+                    op, arg = instructions[pc]
+                    pc += 1
+
+                    if op == LOAD_NAME:
+                        # locals of the current call, and globals that have been set, are read directly
+                        if arg.slot is not None and not arg.depth:
+                            value = scopes[-1]._slots[arg.slot]
+                        elif arg.depth == -1:
+                            value = scopes[0]._vars.get(arg.name)
+                            if value is not None:
+                                value = value[0]
+                        else:
+                            value = None
+
+                        stack.append(value if value is not None else get_variable(arg))
+
+                    elif op == LOAD_CONST:
+                        const = constants.get(arg)
+                        if const is None:
+                            const = runner._constant(arg)
+
+                        stack.append(const)
+
+                    elif op == STORE_NAME:
+                        set_variable(arg[0], stack.pop(), arg[1])
+
+                    elif op == CHARGE:
+                        if limited:
+                            runner._charge(*arg)
+                        else:
+                            runner.statements_executed += arg[0]
+                        if runner.statements_executed >= runner._next_yield:
+                            await runner._yield()
+
+                    elif op == BINARY_OP:
+                        right = stack.pop()
+                        left = stack[-1]
+                        cls = type(left)
+                        # primaries are operated on directly, with the same result as BiOperatorExpr, which wraps it
+                        # in the class of the left operand
+                        if cls is _Integer and type(right) is _Integer:
+                            value = arg[0](left._value, right._value)
+                            if type(value) is bool:
+                                value = int(value)
+                            if type(value) is not int:
+                                stack[-1] = make_primary(cls, value, arg[1].lineno)
+                            elif -5 <= value <= 256:
+                                stack[-1] = small_ints[value + 5]
+                            else:
+                                stack[-1] = _Integer._from_value(value, arg[1].lineno, runner)
+                        elif cls in _primaries and type(right) in _primaries:
+                            stack[-1] = make_primary(cls, arg[0](left._value, right._value), arg[1].lineno)
+                        else:
+                            stack[-1] = arg[2](arg[1], runner, left, right)
+
+                    elif op == POP_JUMP_IF_FALSE:
+                        if not stack.pop():
+                            pc = arg
+
+                    elif op == JUMP:
+                        pc = arg
+
+                    elif op == FOR_ITER:
+                        item = next(stack[-1], _exhausted)
+                        if item is _exhausted:
+                            stack.pop()
+                            pc = arg
+                        else:
+                            stack.append(item)
+
+                    elif op == CALL or op == TAIL_CALL:
+                        argc, node = arg
+                        if argc:
+                            args = stack[-argc:]
+                            del stack[-argc:]
+                        else:
+                            args = []
+
+                        func = stack.pop()
+                        if isinstance(func, objects.Function):
+                            match = self._select_overload(func, args, node.lineno)
+                            target = match._ast
+                            target_code = functions.get(target)
+                            if target_code is None:
+                                target_code = Compiler(functions).compile_function(target)
+
+                            scope = Frame(runner, target, match._scope)
+                            self._bind_arguments(target, args, scope)
+                            if op == TAIL_CALL:
+                                # the callee takes the place of the current call, which has nothing left to run
+                                scopes[-1] = scope
+                                del stack[base:]
+                            else:
+                                runner._enter_call(node.lineno)
+                                scopes.append(scope)
+                                frames.append((instructions, pc, handlers, base))
+                                base = len(stack)
+
+                            instructions = target_code.instructions
+                            pc = 0
+                            handlers = []
+
+                        elif isinstance(func, objects.PyNativeObjectWrapper):
+                            resp = func._invoke(runner, node.lineno, *args)
+                            if inspect.isawaitable(resp):
+                                resp = await resp
+
+                            stack.append(func._wrap(runner, node.lineno, resp))
+
+                        elif inspect.isfunction(func) or inspect.ismethod(func):
+                            resp = func(runner, node.lineno, *args)
+                            if inspect.isawaitable(resp):
+                                resp = await resp
+
+                            stack.append(resp)
+
+                        else:
+                            raise errors.ViperExecutionError(runner, node.name.lineno, f"{func} is not callable")
+
+                    elif op == POP_TOP:
+                        stack.pop()
+
+                    elif op == LOAD_ATTR:
+                        stack[-1] = arg[1]._lookup(runner, stack[-1], arg[0])
+
+                    elif op == RETURN_NONE:
+                        if not frames:
+                            return
+
+                        scopes.pop()
+                        instructions, pc, handlers, base = frames.pop()
+                        runner.call_depth -= 1
+                        stack.append(None)
+
+                    elif op == RETURN_VALUE:
+                        value = stack.pop() if arg else runner.null
+                        if not frames:
+                            return
+
+                        del stack[base:]  # anything a loop left on the stack
+                        scopes.pop()
+                        instructions, pc, handlers, base = frames.pop()
+                        runner.call_depth -= 1
+                        stack.append(value)
+
+                    elif op == GET_ITER:
+                        stack[-1] = iter(arg._iterate(runner, stack[-1]))
+
+                    elif op == LOAD_VALUE:
+                        stack.append(arg)
+
+                    elif op == SETUP_TRY:
+                        handlers.append((arg[0], arg[1], len(stack), len(scopes)))
+
+                    elif op == POP_TRY:
+                        handlers.pop()
+
+                    elif op == DELETE_NAME:
+                        runner._del_variable(arg)
+
+                    elif op == THROW:
+                        value = stack.pop()
+                        if not isinstance(value, objects.String):
+                            raise errors.ViperTypeError(runner, arg.expr.lineno, f"Expected String, got {value}")
+
+                        raise errors.ViperRaisedError(runner, arg.expr.lineno, value._value)
+
+                    elif op == IMPORT:
+                        runner._import_module(arg, arg.lineno)
+
+                    elif op == MAKE_FUNCTION:
+                        runner._define_function(arg)
+
+                    elif op == EVAL:
+                        stack.append(await arg.execute(runner))
+
+                    elif op == EXEC:
+                        await arg.execute(runner)
+
+                    else:
+                        raise RuntimeError(f"Unknown opcode {op}")
+
+            except errors.ViperRaisedError as e:
+                # unwind the frame stack until a try block is found
+                while not handlers:
+                    if not frames:
+                        raise
+
+                    instructions, pc, handlers, base = frames.pop()
+                    runner.call_depth -= 1
+
+                pc, catch_name, stack_size, scope_count = handlers.pop()
+                del stack[stack_size:]
+                del scopes[scope_count:]
+                if catch_name is not None:
+                    runner._set_variable(catch_name, objects.String(e.message, -1, runner), True)